@@ -47,41 +47,52 @@ def format_size(size: int, binary=True) -> str:
 
     return f"{size:.0f} {suffixes[index]}"
 
-def main():
+def get_gpu_info() -> dict | None:
+    """
+    Query the first AMD GPU.
+
+    Returns:
+        dict: temperature, load, core clock and power usage, None without a GPU
+    """
     # Detect the number of GPUs available
     n_devices = pyamdgpuinfo.detect_gpus()
-    
+
     if n_devices == 0:
-        print("No AMD GPUs detected.")
-        return
-    
+        return None
+
     # Get GPU information for the first GPU (index 0)
     first_gpu = pyamdgpuinfo.get_gpu(0)
-    
+
+    # Query GPU temperature
+    temperature = first_gpu.query_temperature()
+    temperature = f"{temperature:.0f}°C"  # Format temperature to 2 digits with "°C"
+
+    # Query GPU core clock
+    core_clock_hz = first_gpu.query_sclk()  # In Hz
+    formatted_core_clock = format_frequency(core_clock_hz)
+
+    # Query GPU power consumption
+    power_usage = first_gpu.query_power()
+
+    # Query GPU load
+    gpu_load = first_gpu.query_load()
+    formatted_gpu_load = f"{gpu_load:.1f}%"  # Format GPU load to 1 decimal place
+
+    # Create a dictionary with the GPU information
+    return {
+        "GPU Temperature": temperature,
+        "GPU Load": formatted_gpu_load,
+        "GPU Core Clock": formatted_core_clock,
+        "GPU Power Usage": f"{power_usage} Watts"
+    }
+
+def main():
     try:
-        # Query GPU temperature
-        temperature = first_gpu.query_temperature()
-        temperature = f"{temperature:.0f}°C"  # Format temperature to 2 digits with "°C"
-        
-        # Query GPU core clock
-        core_clock_hz = first_gpu.query_sclk()  # In Hz
-        formatted_core_clock = format_frequency(core_clock_hz)
-        
-        # Query GPU power consumption
-        power_usage = first_gpu.query_power()
-
-        # Query GPU load
-        gpu_load = first_gpu.query_load()
-        formatted_gpu_load = f"{gpu_load:.1f}%"  # Format GPU load to 1 decimal place
-
-        # Create a dictionary with the GPU information
-        gpu_info = {
-            "GPU Temperature": temperature,
-            "GPU Load": formatted_gpu_load,
-            "GPU Core Clock": formatted_core_clock,
-            "GPU Power Usage": f"{power_usage} Watts"
-        }
-        
+        gpu_info = get_gpu_info()
+        if gpu_info is None:
+            print("No AMD GPUs detected.")
+            return
+
         # Convert the dictionary to a JSON string, ensure_ascii=False to prevent escaping
         json_output = json.dumps(gpu_info, ensure_ascii=False)
 
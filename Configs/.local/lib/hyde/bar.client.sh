@@ -0,0 +1,28 @@
+#!/usr/bin/env bash
+#? Waybar exec for the modules hosted by bar.daemon.py
+#? Usage: hyde-shell bar.client <module>
+#? The module's socket is streamed by socat or netcat, Python only runs once
+#? to start the daemon when it is not running
+
+module="${1:?Usage: bar.client.sh <module>}"
+barDir="${XDG_RUNTIME_DIR:-/run/user/$(id -u)}/hyde/bar"
+socket="${barDir}/${module}.sock"
+
+daemon_running() {
+    local pid
+    [[ -S "${socket}" ]] && read -r pid 2>/dev/null <"${barDir}/daemon.pid" && kill -0 "${pid}" 2>/dev/null
+}
+
+if ! daemon_running; then
+    # Binds every module socket and hands them to a detached daemon, then exits
+    hyde-shell bar.daemon start || exit 1
+fi
+
+if command -v socat &>/dev/null; then
+    exec socat -u "UNIX-CONNECT:${socket}" -
+elif command -v ncat &>/dev/null; then
+    exec ncat -U --recv-only "${socket}"
+elif nc -h 2>&1 | grep -q -- "-U"; then #! openbsd netcat only
+    exec nc -d -U "${socket}"
+fi
+exec hyde-shell bar.daemon client "${module}"
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Bar daemon hosting HyDE's Python waybar modules in one interpreter
+- run: loads modules as plugins when their first client connects, polls or
+  streams them from one event loop and publishes each module's output on
+  $XDG_RUNTIME_DIR/hyde/bar/<module>.sock
+- start: binds the module sockets, hands them to a detached daemon and exits
+- client <module>: copies a module's output to stdout, starting the daemon
+  when it is not running
+
+waybar's exec is bar.client.sh, which runs start when needed and then
+streams the socket with socat or netcat, so no interpreter stays resident
+per module. Any Unix socket reader works as a client, e.g.
+    socat -u UNIX-CONNECT:$XDG_RUNTIME_DIR/hyde/bar/weather.sock -
+Writing "refresh" to a module socket polls that module right away.
+"""
+
+import fcntl
+import os
+import socket
+import sys
+import time
+from abc import ABC, abstractmethod
+
+# waybar starts a client per module, so anything only the daemon or the
+# argument parser needs is imported where it is used
+
+RUNTIME_DIR = os.getenv("XDG_RUNTIME_DIR", os.path.join("/run/user", str(os.getuid())))
+BAR_DIR = os.path.join(RUNTIME_DIR, "hyde", "bar")
+PID_FILE = os.path.join(BAR_DIR, "daemon.pid")
+LOCK_FILE = os.path.join(BAR_DIR, "daemon.lock")
+
+
+def socket_path(name):
+    """Socket a module's output is published on"""
+    return os.path.join(BAR_DIR, f"{name}.sock")
+
+
+class PluginIdle(Exception):
+    """Raised into a streaming plugin once its module has no clients left"""
+
+
+class BarPlugin(ABC):
+    """A module hosted by the daemon, either polled or streaming its output"""
+
+    def __init__(self, name):
+        self.name = name
+        self.module = None
+
+    def load(self):
+        """Import the module, runs on the plugin's own thread"""
+
+
+class PolledPlugin(BarPlugin):
+    """A module whose output is polled every interval seconds"""
+
+    interval = 5
+
+    @abstractmethod
+    def poll(self):
+        """Return the current output, a dict or a ready line"""
+
+
+class StreamingPlugin(BarPlugin):
+    """A module that publishes output as it changes"""
+
+    @abstractmethod
+    def run(self, publish, wanted):
+        """Publish output until done, wanted is cleared when nobody listens"""
+
+
+class WeatherPlugin(PolledPlugin):
+    """weather.py, fetched from wttr.in"""
+
+    interval = 30
+
+    def load(self):
+        import weather
+
+        self.module = weather
+
+    def poll(self):
+        return self.module.get_weather()
+
+
+class SensorsPlugin(PolledPlugin):
+    """sensorsinfo.py, the page is switched with sensorsinfo --next/--prev"""
+
+    interval = 5
+
+    def load(self):
+        import sensorsinfo
+
+        self.module = sensorsinfo
+
+    def poll(self):
+        return self.module.get_sensor_info()
+
+
+class AmdGpuPlugin(PolledPlugin):
+    """amdgpu.py, the first AMD GPU's sensors"""
+
+    interval = 5
+
+    def load(self):
+        import amdgpu
+
+        self.module = amdgpu
+
+    def poll(self):
+        return self.module.get_gpu_info() or "No AMD GPUs detected."
+
+
+class NotificationsPlugin(PolledPlugin):
+    """notifications.py, dunst history and do not disturb state"""
+
+    interval = 1
+
+    def load(self):
+        import notifications
+
+        self.module = notifications
+
+    def poll(self):
+        return self.module.format_history(self.module.get_dunst_history())
+
+
+class MediaPlayerPlugin(StreamingPlugin):
+    """mediaplayer.py, driven by its Playerctl/GLib main loop"""
+
+    def run(self, publish, wanted):
+        import mediaplayer
+
+        mediaplayer.output_handler = publish
+        mediaplayer.run(keep_running=wanted.is_set)
+        if not wanted.is_set():
+            raise PluginIdle()
+
+
+class CavaPlugin(StreamingPlugin):
+    """cava.py waybar --json, one render subscription to the cava manager"""
+
+    def run(self, publish, wanted):
+        import argparse
+        import threading
+        import cava
+
+        client = cava.CavaClient()
+        done = threading.Event()
+
+        def watch():
+            # A silent or paused cava sends no frames to notice it by
+            while not done.wait(1):
+                if not wanted.is_set():
+                    client.stop()
+
+        def output(data):
+            if not wanted.is_set():
+                # Frees the cava manager once the bar stops listening
+                raise PluginIdle()
+            publish(data.decode("utf-8").rstrip("\n"))
+
+        hyde_config = cava.HydeConfig()
+        args = argparse.Namespace(
+            bar=None,
+            bar_array=None,
+            width=None,
+            stb=None,
+            fps=None,
+            bars=None,
+            range=None,
+        )
+        bar_chars, width, standby_mode = cava.CavaClient.parse_command_config(
+            hyde_config, "waybar", args
+        )
+        bars, range_val = cava.CavaClient.parse_command_capture(
+            hyde_config, "waybar", args
+        )
+        threading.Thread(target=watch, daemon=True).start()
+        try:
+            client.start(
+                bar_chars,
+                width,
+                standby_mode,
+                bars=bars,
+                range_val=range_val,
+                json_output=True,
+                command="waybar",
+                command_args=vars(args),
+                max_fps=cava.CavaClient.parse_command_fps(hyde_config, "waybar", args),
+                output=output,
+            )
+        finally:
+            done.set()
+        if not wanted.is_set():
+            raise PluginIdle()
+
+
+PLUGINS = {
+    "weather": WeatherPlugin,
+    "sensorsinfo": SensorsPlugin,
+    "amdgpu": AmdGpuPlugin,
+    "notifications": NotificationsPlugin,
+    "mediaplayer": MediaPlayerPlugin,
+    "cava": CavaPlugin,
+}
+
+
+class BarDaemon:
+    """Host the plugins and publish their output on per module sockets"""
+
+    # Seconds without any client before the daemon exits
+    IDLE_TIMEOUT = 60
+    # Seconds before a streaming plugin that stopped is started again
+    RESTART_DELAY = 2
+
+    def __init__(self):
+        import queue
+
+        self.selector = None
+        self.listeners = {}
+        self.clients = {name: [] for name in PLUGINS}
+        # Clients behind on a line: [unsent tail, newest line queued after it]
+        self.pending = {}
+        # Last line of each module, sent to clients as they connect
+        self.last_output = {}
+        self.plugins = {}
+        # Polled plugins: event that wakes their thread and next poll time
+        self.poll_events = {}
+        self.next_poll = {}
+        # Streaming plugins: set while their module has clients
+        self.wanted = {}
+        # Output published from plugin threads, handed to the event loop
+        self.outbox = queue.SimpleQueue()
+        self.wakeup_read, self.wakeup_write = os.pipe()
+        os.set_blocking(self.wakeup_read, False)
+        os.set_blocking(self.wakeup_write, False)
+        self.last_client_time = time.monotonic()
+        self.should_shutdown = False
+
+    def _signal_handler(self, signum, frame):
+        """Handle signals gracefully, the event loop exits on its next pass"""
+        self.should_shutdown = True
+
+    def publish(self, name, output):
+        """Queue a module's output for its clients, safe from any thread"""
+        import json
+
+        line = output if isinstance(output, str) else json.dumps(output)
+        self.outbox.put((name, line.encode("utf-8") + b"\n"))
+        try:
+            os.write(self.wakeup_write, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _listen(self, inherited):
+        """Adopt the sockets a client bound for us and bind the others"""
+        import selectors
+
+        os.makedirs(BAR_DIR, exist_ok=True)
+        for name in PLUGINS:
+            if name in inherited:
+                listener = socket.socket(fileno=inherited[name])
+            else:
+                path = socket_path(name)
+                listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    listener.bind(path)
+                    listener.listen(16)
+                except OSError as e:
+                    print(f"Error: Could not bind {path}: {e}")
+                    listener.close()
+                    continue
+            listener.setblocking(False)
+            self.listeners[name] = listener
+            self.selector.register(listener, selectors.EVENT_READ, name)
+
+    def _start_plugin(self, name):
+        """Load a plugin on its own thread the first time it is asked for"""
+        import threading
+
+        plugin = self.plugins.get(name)
+        if plugin is None:
+            plugin = self.plugins[name] = PLUGINS[name](name)
+            if isinstance(plugin, PolledPlugin):
+                self.poll_events[name] = threading.Event()
+                self.next_poll[name] = 0.0
+                target = self._poll_worker
+            else:
+                self.wanted[name] = threading.Event()
+                target = self._stream_worker
+            print(f"Starting {name}")
+            threading.Thread(target=target, args=(plugin,), daemon=True).start()
+        if name in self.wanted:
+            self.wanted[name].set()
+
+    def _poll_worker(self, plugin):
+        """Run a polled plugin's updates whenever the event loop asks"""
+        try:
+            plugin.load()
+        except Exception as e:
+            print(f"Error: Could not load {plugin.name}: {e}")
+            return
+        event = self.poll_events[plugin.name]
+        while True:
+            event.wait()
+            event.clear()
+            try:
+                self.publish(plugin.name, plugin.poll())
+            except Exception as e:
+                print(f"Error: {plugin.name} update failed: {e}")
+
+    def _stream_worker(self, plugin):
+        """Keep a streaming plugin running while its module has clients"""
+        wanted = self.wanted[plugin.name]
+        while True:
+            wanted.wait()
+            try:
+                plugin.run(lambda output: self.publish(plugin.name, output), wanted)
+            except PluginIdle:
+                continue
+            except (Exception, SystemExit) as e:
+                print(f"Error: {plugin.name} stopped: {e}")
+            time.sleep(self.RESTART_DELAY)
+
+    def _accept_clients(self, name):
+        """Accept new clients of a module and send them its last output"""
+        import selectors
+
+        listener = self.listeners[name]
+        while True:
+            try:
+                client, _ = listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client.setblocking(False)
+            self.clients[name].append(client)
+            self.selector.register(client, selectors.EVENT_READ, (name, client))
+            if name in self.last_output:
+                self._send(name, client, self.last_output[name])
+            self._start_plugin(name)
+
+    def _read_client(self, name, client):
+        """Handle a refresh request or a client that went away"""
+        try:
+            data = client.recv(1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._remove_client(name, client)
+        elif b"refresh" in data and name in self.next_poll:
+            self.next_poll[name] = 0.0
+
+    def _send(self, name, client, data):
+        """Send a line to a client, keeping what it could not take yet"""
+        import selectors
+
+        pending = self.pending.get(client)
+        if pending is not None:
+            # Still writing an earlier line, only the newest one is worth sending
+            pending[1] = data
+            return
+        try:
+            sent = client.send(data)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._remove_client(name, client)
+            return
+        if sent < len(data):
+            self.pending[client] = [data[sent:], None]
+            self.selector.modify(
+                client, selectors.EVENT_READ | selectors.EVENT_WRITE, (name, client)
+            )
+
+    def _flush_client(self, name, client):
+        """Write the rest of a client's pending lines once it reads again"""
+        import selectors
+
+        pending = self.pending[client]
+        while True:
+            try:
+                sent = client.send(pending[0])
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self._remove_client(name, client)
+                return
+            pending[0] = pending[0][sent:]
+            if pending[0]:
+                return
+            if pending[1] is None:
+                break
+            pending[0], pending[1] = pending[1], None
+        del self.pending[client]
+        self.selector.modify(client, selectors.EVENT_READ, (name, client))
+
+    def _remove_client(self, name, client):
+        """Forget a client, streaming plugins stop with their last one"""
+        if client in self.clients[name]:
+            self.clients[name].remove(client)
+            self.pending.pop(client, None)
+            try:
+                self.selector.unregister(client)
+            except (KeyError, ValueError):
+                pass
+            client.close()
+        if not self.clients[name]:
+            if name in self.wanted:
+                self.wanted[name].clear()
+            if not any(self.clients.values()):
+                self.last_client_time = time.monotonic()
+
+    def _deliver_output(self):
+        """Send output queued by the plugin threads to the module clients"""
+        try:
+            while os.read(self.wakeup_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        while not self.outbox.empty():
+            name, data = self.outbox.get()
+            if data == self.last_output.get(name):
+                continue
+            self.last_output[name] = data
+            for client in self.clients[name][:]:
+                self._send(name, client, data)
+
+    def _schedule_polls(self, now):
+        """Wake polled plugins that are due, returns seconds to the next one"""
+        timeout = 1.0
+        for name, due in self.next_poll.items():
+            if not self.clients[name]:
+                continue
+            if now >= due:
+                self.poll_events[name].set()
+                due = self.next_poll[name] = now + self.plugins[name].interval
+            timeout = min(timeout, due - now)
+        return max(timeout, 0.0)
+
+    def _run_loop(self):
+        """Multiplex module sockets, plugin output and poll timers"""
+        import selectors
+
+        timeout = 0.0
+        while not self.should_shutdown:
+            for key, mask in self.selector.select(timeout=timeout):
+                if key.fileobj == self.wakeup_read:
+                    self._deliver_output()
+                elif isinstance(key.data, str):
+                    self._accept_clients(key.data)
+                else:
+                    name, client = key.data
+                    if mask & selectors.EVENT_WRITE and client in self.pending:
+                        self._flush_client(name, client)
+                    if mask & selectors.EVENT_READ and client in self.clients[name]:
+                        self._read_client(name, client)
+
+            now = time.monotonic()
+            timeout = self._schedule_polls(now)
+            if (
+                not any(self.clients.values())
+                and now - self.last_client_time > self.IDLE_TIMEOUT
+            ):
+                print(f"No clients for {self.IDLE_TIMEOUT} seconds, shutting down...")
+                self.should_shutdown = True
+
+    def cleanup(self):
+        """Remove the sockets and PID file this daemon owns"""
+        try:
+            with open(PID_FILE, "r") as f:
+                owner = int(f.read().strip()) == os.getpid()
+        except (ValueError, OSError):
+            owner = False
+        for name, listener in self.listeners.items():
+            listener.close()
+            if owner:
+                try:
+                    os.remove(socket_path(name))
+                except FileNotFoundError:
+                    pass
+        if owner:
+            os.remove(PID_FILE)
+        print("Cleanup complete.")
+
+    def start(self, inherited=None):
+        """Start the daemon, inherited maps module names to listening fds"""
+        import selectors
+        import signal
+
+        try:
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.wakeup_read, selectors.EVENT_READ)
+            self._listen(inherited or {})
+            with open(PID_FILE, "w") as f:
+                f.write(str(os.getpid()))
+            print(f"Bar daemon started. Sockets: {BAR_DIR}")
+
+            signal.signal(signal.SIGTERM, self._signal_handler)
+            signal.signal(signal.SIGINT, self._signal_handler)
+            self._run_loop()
+        finally:
+            self.cleanup()
+            # Plugin threads may be blocked in their modules
+            os._exit(0)
+
+
+def daemon_running():
+    """Check whether the PID file names a live daemon"""
+    try:
+        with open(PID_FILE, "r") as f:
+            os.kill(int(f.read().strip()), 0)
+        return True
+    except (ValueError, OSError):
+        return False
+
+
+def spawn_daemon(listeners):
+    """Run the daemon on the listening sockets, detached from this process
+
+    The intermediate child records the daemon's PID and exits right away,
+    so the caller reaps it and the daemon has no parent left to reap it.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+    try:
+        os.setsid()
+        daemon_pid = os.fork()
+        if daemon_pid:
+            # Written before the start lock is released, see start_daemon()
+            with open(PID_FILE, "w") as f:
+                f.write(str(daemon_pid))
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.close(devnull)
+        for listener in listeners.values():
+            os.set_inheritable(listener.fileno(), True)
+        fds = ",".join(f"{m}={s.fileno()}" for m, s in listeners.items())
+        script = os.path.abspath(__file__)
+        os.execv(sys.executable, [sys.executable, script, "run", "--listen-fds", fds])
+    finally:
+        os._exit(1)
+
+
+def start_daemon():
+    """Start the daemon on ready sockets unless one is running, then return"""
+    os.makedirs(BAR_DIR, exist_ok=True)
+    with open(LOCK_FILE, "w") as lock:
+        # One launcher starts the daemon, the others wait here and find it
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if daemon_running():
+            return
+        print("Bar daemon not running, starting it...", file=sys.stderr)
+        # Every module socket listens before the daemon starts, so clients
+        # connect right away and wait in the backlog instead of polling
+        listeners = {}
+        for module in PLUGINS:
+            path = socket_path(module)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(path)
+            listener.listen(16)
+            listeners[module] = listener
+        spawn_daemon(listeners)
+        for listener in listeners.values():
+            listener.close()
+
+
+def connect(name):
+    """Connect to a module, starting the daemon if needed"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path(name))
+        return client
+    except (ConnectionRefusedError, FileNotFoundError):
+        client.close()
+
+    start_daemon()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path(name))
+    except (ConnectionRefusedError, FileNotFoundError):
+        print(f"Error: Bar daemon does not serve {name}", file=sys.stderr)
+        sys.exit(1)
+    return client
+
+
+def run_client(name):
+    """Copy a module's output to stdout until the daemon goes away"""
+    client = connect(name)
+    fd = sys.stdout.fileno()
+    try:
+        while True:
+            data = client.recv(65536)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view) :]
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        client.close()
+
+
+def main():
+    """Main entry point"""
+    # The paths waybar takes, without loading argparse
+    if sys.argv[1:] == ["start"]:
+        start_daemon()
+        return
+    if len(sys.argv) == 3 and sys.argv[1] == "client" and sys.argv[2] in PLUGINS:
+        run_client(sys.argv[2])
+        return
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HyDE bar module daemon")
+    subparsers = parser.add_subparsers(dest="command", help="Commands")
+
+    run_parser = subparsers.add_parser("run", help="Run the daemon")
+    run_parser.add_argument("--listen-fds", default="", help=argparse.SUPPRESS)
+
+    subparsers.add_parser(
+        "start", help="Start the daemon in the background unless it is running"
+    )
+
+    client_parser = subparsers.add_parser(
+        "client", help="Print a module's output (bar.client.sh is lighter)"
+    )
+    client_parser.add_argument("module", choices=sorted(PLUGINS), help="Module")
+
+    refresh_parser = subparsers.add_parser(
+        "refresh", help="Update a polled module right away"
+    )
+    refresh_parser.add_argument("module", choices=sorted(PLUGINS), help="Module")
+
+    subparsers.add_parser("status", help="Check daemon status")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        inherited = {}
+        for item in filter(None, args.listen_fds.split(",")):
+            name, fd = item.split("=", 1)
+            inherited[name] = int(fd)
+        if not inherited and daemon_running():
+            print("Bar daemon is already running")
+            sys.exit(0)
+        BarDaemon().start(inherited)
+
+    elif args.command == "start":
+        start_daemon()
+
+    elif args.command == "client":
+        run_client(args.module)
+
+    elif args.command == "refresh":
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.connect(socket_path(args.module))
+                s.sendall(b"refresh\n")
+        except OSError:
+            print("Bar daemon is not running", file=sys.stderr)
+            sys.exit(1)
+
+    elif args.command == "status":
+        if daemon_running():
+            print("Bar daemon is running")
+            sys.exit(0)
+        print("Bar daemon is not running")
+        sys.exit(1)
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
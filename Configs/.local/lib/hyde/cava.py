@@ -9,21 +9,70 @@ This script can act as both a manager (server) and client (reader)
 """
 
 import socket
+import selectors
 import subprocess
 import os
 import sys
-import threading
 import time
 import argparse
 import signal
 import atexit
+import fcntl
 import json
 import shlex
+import shutil
+import struct
+import threading
+from array import array
 from pathlib import Path
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Binary wire protocol: every frame is FRAME_HEADER followed by `bars`
+# samples of `sample_width` bytes (native byte order), already scaled to
+# 0..max_value. Clients opt in with CMD:SUBSCRIBE, others get ascii lines.
+FRAME_MAGIC = b"CV"
+FRAME_VERSION = 1
+# magic, version, sample width, bar count, max value, sequence
+FRAME_HEADER = struct.Struct("=2sBBHHI")
+# Sent once before the first line to clients subscribed with proto "render"
+RENDER_ACK = b"CV:render\n"
+# Sent to clients subscribed with proto "shm", followed by the ring name
+SHM_ACK = b"CV:shm "
+# Run as `python -c DETACH_SCRIPT program args...`: starts program in a new
+# session and exits at once, leaving it to init instead of the caller
+DETACH_SCRIPT = (
+    "import os, sys; os.setsid(); os.fork() and os._exit(0); "
+    "os.execv(sys.argv[1], sys.argv[1:])"
+)
+
+
+def percentiles(samples):
+    """Summarize durations in seconds as avg/p50/p99/max microseconds"""
+    if not samples:
+        return {"avg": 0, "p50": 0, "p99": 0, "max": 0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        "avg": round(sum(ordered) / len(ordered) * 1e6, 1),
+        "p50": round(ordered[last // 2] * 1e6, 1),
+        "p99": round(ordered[(last * 99) // 100] * 1e6, 1),
+        "max": round(ordered[last] * 1e6, 1),
+    }
+
 
 class HydeConfig:
-    """Handle Hyde configuration loading and parsing"""
+    """Handle Hyde configuration loading and parsing
+
+    Parsed files are cached for the whole process and only parsed again
+    once their mtime, size or inode changes.
+    """
+
+    # config file -> ((mtime, size, inode), parsed config)
+    _cache = {}
 
     def __init__(self):
         self.config = self._load_config()
@@ -33,9 +82,21 @@ class HydeConfig:
         state_dir = os.path.expanduser(os.getenv("XDG_STATE_HOME", "~/.local/state"))
         config_file = os.path.join(state_dir, "hyde", "config")
 
-        if not os.path.exists(config_file):
+        try:
+            stat = os.stat(config_file)
+        except OSError:
             return {}
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        cached = self._cache.get(config_file)
+        if cached and cached[0] == signature:
+            return cached[1]
+        config = self._parse(config_file)
+        HydeConfig._cache[config_file] = (signature, config)
+        return config
 
+    @staticmethod
+    def _parse(config_file):
+        """Parse the export KEY=value lines of a config file"""
         config = {}
         try:
             with open(config_file, "r") as f:
@@ -62,60 +123,190 @@ class HydeConfig:
         """Get value from Hyde config, falling back to environment, then default"""
         return self.config.get(key, os.getenv(key, default))
 
+    def get_int(self, key, default=0):
+        """Get an integer value, default when unset or malformed"""
+        try:
+            return int(self.get_value(key))
+        except (TypeError, ValueError):
+            return default
 
-class CavaDataParser:
-    """Handle cava data parsing and formatting"""
+    def get_float(self, key, default=0.0):
+        """Get a float value, default when unset or malformed"""
+        try:
+            return float(self.get_value(key))
+        except (TypeError, ValueError):
+            return default
+
+    def get_bool(self, key, default=False):
+        """Get a boolean value from 1/0, true/false, yes/no or on/off"""
+        value = self.get_value(key)
+        if not isinstance(value, str) or not value.strip():
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    def get_list(self, key, default=None):
+        """Get a KEY=(a b c) array value, default when it is not an array"""
+        value = self.get_value(key)
+        return value if isinstance(value, list) else default
+
+
+class CavaRenderer:
+    """Precompiled renderer for a fixed (bar_chars, width, source bar count)"""
+
+    def __init__(self, bar_chars, width, source_bars, max_value=255):
+        self.bar_chars = bar_chars
+        self.source_bars = source_bars
+        self.width = width or source_bars
+        self.glyphs = tuple(bar_chars)
+        self.top_glyph = self.glyphs[-1]
+        # value -> glyph table, values past the last glyph clamp to it
+        self.table = self.glyphs + (self.top_glyph,) * max(
+            0, max_value + 1 - len(self.glyphs)
+        )
+        self.taps = self._build_taps(self.width, source_bars)
 
     @staticmethod
-    def format_data(line, bar_chars="▁▂▃▄▅▆▇█", width=None, standby_mode=""):
-        """Format cava data with custom bar characters (list or string)"""
-        line = line.strip()
-        if not line:
-            return CavaDataParser._handle_standby_mode(standby_mode, bar_chars, width)
+    def _build_taps(width, source_bars):
+        """Precompute (left, right, fraction) interpolation taps, None if no resampling"""
+        if width == source_bars:
+            return None
+        last = source_bars - 1
+        taps = []
+        for i in range(width):
+            original_pos = (i * last) / (width - 1) if width > 1 else 0
+            left_idx = int(original_pos)
+            right_idx = min(left_idx + 1, last)
+            taps.append((left_idx, right_idx, original_pos - left_idx))
+        return tuple(taps)
+
+    def resample(self, values):
+        """Linearly interpolate values to the renderer width"""
+        if self.taps is None:
+            return values
+        return [
+            (
+                values[left]
+                if left == right
+                else int(
+                    round(values[left] + (values[right] - values[left]) * fraction)
+                )
+            )
+            for left, right, fraction in self.taps
+        ]
 
+    def render(self, values):
+        """Render a list of bar values to a glyph string"""
+        return self.render_resampled(self.resample(values))
+
+    def render_resampled(self, values):
+        """Render bar values already resampled to the renderer width"""
         try:
-            values = [int(x) for x in line.split(";") if x.isdigit()]
-        except ValueError:
-            return CavaDataParser._handle_standby_mode(standby_mode, bar_chars, width)
+            return "".join(map(self.table.__getitem__, values))
+        except IndexError:
+            table, top = self.table, len(self.table) - 1
+            return "".join([table[v if v < top else top] for v in values])
+
+
+class CavaResampler:
+    """Resample one frame to several widths in a single pass"""
+
+    # Below this many taps plain Python beats the NumPy call overhead
+    NUMPY_MIN_TAPS = 16
+
+    def __init__(self, source_bars, widths):
+        self.source_bars = source_bars
+        self.widths = tuple(sorted(set(widths)))
+        self.key = (source_bars, self.widths)
+        # All taps of all widths back to back, sliced per width afterwards
+        taps = []
+        self.slices = {}
+        for width in self.widths:
+            start = len(taps)
+            taps.extend(
+                CavaRenderer._build_taps(width, source_bars)
+                or ((i, i, 0.0) for i in range(source_bars))
+            )
+            self.slices[width] = (start, len(taps))
+        self.taps = tuple(taps)
+        self.use_numpy = numpy is not None and len(taps) >= self.NUMPY_MIN_TAPS
+        if self.use_numpy:
+            self.left = numpy.array([t[0] for t in taps], dtype=numpy.intp)
+            self.right = numpy.array([t[1] for t in taps], dtype=numpy.intp)
+            self.fraction = numpy.array([t[2] for t in taps], dtype=numpy.float64)
+
+    def _interpolate(self, values):
+        """Interpolate every tap, rounding exactly like CavaRenderer.resample"""
+        if self.use_numpy:
+            if isinstance(values, (bytes, bytearray)):
+                source = numpy.frombuffer(values, dtype=numpy.uint8)
+            elif isinstance(values, array):
+                source = numpy.frombuffer(values, dtype=values.typecode)
+            else:
+                source = numpy.array(values)
+            source = source.astype(numpy.float64)
+            left = source[self.left]
+            # rint rounds half to even like round(), on the same doubles
+            return (
+                numpy.rint(left + (source[self.right] - left) * self.fraction)
+                .astype(numpy.int64)
+                .tolist()
+            )
+        return [
+            (
+                values[left]
+                if left == right
+                else int(
+                    round(values[left] + (values[right] - values[left]) * fraction)
+                )
+            )
+            for left, right, fraction in self.taps
+        ]
 
-        if not values or all(v == 0 for v in values):
-            return CavaDataParser._handle_standby_mode(standby_mode, bar_chars, width)
+    def resample(self, values):
+        """Map every width to the frame resampled to it"""
+        out = self._interpolate(values)
+        return {width: out[start:end] for width, (start, end) in self.slices.items()}
 
-        if not width:
-            width = len(values)
 
-        if len(values) != width:
-            expanded_values = []
-            for i in range(width):
-                original_pos = (i * (len(values) - 1)) / (width - 1) if width > 1 else 0
+class CavaDataParser:
+    """Handle cava data parsing and formatting"""
 
-                left_idx = int(original_pos)
-                right_idx = min(left_idx + 1, len(values) - 1)
+    _renderers = {}
 
-                if left_idx == right_idx:
-                    expanded_values.append(values[left_idx])
-                else:
-                    fraction = original_pos - left_idx
-                    interpolated = (
-                        values[left_idx]
-                        + (values[right_idx] - values[left_idx]) * fraction
-                    )
-                    expanded_values.append(int(round(interpolated)))
+    @staticmethod
+    def parse_values(line):
+        """Parse a cava ascii frame ("3;7;0;") into a list of ints"""
+        line = line.strip().rstrip(";")
+        # int() alone would also take signs and spaces, a negative value would
+        # index the glyph table from the end
+        if line.replace(";", "").isdecimal():
+            try:
+                return list(map(int, line.split(";")))
+            except ValueError:
+                pass
+        return [int(x) for x in line.split(";") if x.isdecimal()]
 
-            values = expanded_values
+    @classmethod
+    def get_renderer(cls, bar_chars, width, source_bars):
+        """Get a cached renderer for the given output shape"""
+        key = (tuple(bar_chars), width or source_bars, source_bars)
+        renderer = cls._renderers.get(key)
+        if renderer is None:
+            renderer = cls._renderers[key] = CavaRenderer(bar_chars, width, source_bars)
+        return renderer
 
-        bar_length = len(bar_chars)
-        result = ""
+    @staticmethod
+    def format_data(line, bar_chars="▁▂▃▄▅▆▇█", width=None, standby_mode=""):
+        """Format cava data with custom bar characters (list or string)"""
+        line = line.strip()
+        if not line:
+            return CavaDataParser._handle_standby_mode(standby_mode, bar_chars, width)
 
-        for value in values:
-            if value >= bar_length:
-                char_index = bar_length - 1
-            else:
-                char_index = value
-            # bar_chars can be a list or string
-            result += bar_chars[char_index]
+        values = CavaDataParser.parse_values(line)
+        if not any(values):
+            return CavaDataParser._handle_standby_mode(standby_mode, bar_chars, width)
 
-        return result
+        return CavaDataParser.get_renderer(bar_chars, width, len(values)).render(values)
 
     @staticmethod
     def _handle_standby_mode(standby_mode, bar_chars, width):
@@ -136,8 +327,1105 @@ class CavaDataParser:
             return str(standby_mode)
 
 
+class CavaFrameProcessor:
+    """Optional smoothing, gravity with peak hold and normalization of frames
+
+    State lives in arrays allocated once per bar count, only the returned
+    frame is a new object since pipelines keep it as the last frame.
+    """
+
+    # Slots of the sliding normalization window, each covers normalize/SLOTS
+    WINDOW_SLOTS = 32
+    # Quiet passages are not blown up past this gain
+    MIN_SPAN = 0.1
+
+    def __init__(self):
+        # Weight of the previous frame, 0 turns smoothing off
+        self.smoothing = 0.0
+        # Fall speed in full ranges per second, 0 turns gravity off
+        self.gravity = 0.0
+        # Seconds a peak stays up before gravity pulls it down
+        self.peak_hold = 0.0
+        # Length of the min/max normalization window in seconds, 0 for off
+        self.normalize = 0.0
+        self.bars = 0
+        self.last_time = None
+        self.window_slot = None
+        self.window_hi = array("d", [0.0] * self.WINDOW_SLOTS)
+        self.window_lo = array("d", [float("inf")] * self.WINDOW_SLOTS)
+
+    @property
+    def enabled(self):
+        """Whether any stage is configured"""
+        return bool(self.smoothing or self.gravity or self.normalize)
+
+    def configure(self, smoothing=0.0, gravity=0.0, peak_hold=0.0, normalize=0.0):
+        """Apply settings, frames keep their state across a reload"""
+        self.smoothing = min(max(smoothing, 0.0), 0.95)
+        self.gravity = max(gravity, 0.0)
+        self.peak_hold = max(peak_hold, 0.0)
+        if max(normalize, 0.0) != self.normalize:
+            self.normalize = max(normalize, 0.0)
+            self.window_slot = None
+
+    def _allocate(self, bars, typecode):
+        """Size the per bar state for a new bar count"""
+        self.bars = bars
+        self.levels = array("d", [0.0] * bars)
+        self.peaks = array("d", [0.0] * bars)
+        self.peak_until = array("d", [0.0] * bars)
+        self.out = array(typecode, [0] * bars)
+
+    def _window(self, values, now):
+        """Add a frame to the sliding window, returns its (low, high)"""
+        slots = self.WINDOW_SLOTS
+        slot = int(now * slots / self.normalize)
+        hi, lo = self.window_hi, self.window_lo
+        if self.window_slot is None or slot - self.window_slot >= slots:
+            for i in range(slots):
+                hi[i], lo[i] = 0.0, float("inf")
+        else:
+            # Slots the window slid past start over
+            for stale in range(self.window_slot + 1, slot + 1):
+                hi[stale % slots], lo[stale % slots] = 0.0, float("inf")
+        self.window_slot = slot
+        index = slot % slots
+        hi[index] = max(hi[index], max(values))
+        lo[index] = min(lo[index], min(values))
+        return min(lo), max(hi)
+
+    def process(self, values, now, max_value):
+        """Return the processed copy of a frame of bar values"""
+        typecode = "B" if max_value <= 255 else "H"
+        if len(values) != self.bars or self.out.typecode != typecode:
+            self._allocate(len(values), typecode)
+        dt = 0.0 if self.last_time is None else now - self.last_time
+        self.last_time = now
+
+        offset, scale = 0.0, 1.0
+        if self.normalize:
+            lo, hi = self._window(values, now)
+            offset = lo
+            scale = max_value / max(hi - lo, max_value * self.MIN_SPAN)
+        keep = self.smoothing
+        take = 1.0 - keep
+        gravity = self.gravity
+        fall = gravity * max_value * dt
+        hold = self.peak_hold
+        levels, peaks, peak_until, out = (
+            self.levels,
+            self.peaks,
+            self.peak_until,
+            self.out,
+        )
+        for i, value in enumerate(values):
+            target = (value - offset) * scale
+            if target > max_value:
+                target = max_value
+            elif target < 0:
+                target = 0.0
+            level = levels[i] = keep * levels[i] + take * target
+            if gravity:
+                if level >= peaks[i]:
+                    peaks[i] = level
+                    peak_until[i] = now + hold
+                elif now >= peak_until[i]:
+                    peaks[i] = max(level, peaks[i] - fall)
+                level = peaks[i]
+            out[i] = int(level + 0.5)
+        return out[:]
+
+
+class CavaFrameFormatter:
+    """Format frames into output lines for one render spec"""
+
+    JSON_PREFIX = '{"text": "'
+
+    def __init__(
+        self, bar_chars="▁▂▃▄▅▆▇█", width=None, standby_mode=0, json_output=False
+    ):
+        self.bar_chars = bar_chars
+        self.width = width
+        self.standby_mode = standby_mode
+        self.json_output = json_output
+        self.renderer = None
+        self.standby_output = CavaDataParser._handle_standby_mode(
+            standby_mode, bar_chars, width
+        )
+        self.glyphs = bar_chars
+        if json_output:
+            # Glyphs are escaped once, frames are spliced into a fixed template
+            self.glyphs = [self._escape(char) for char in bar_chars]
+            self.standby_output = self._escape(self.standby_output)
+            self.active_suffix = self._json_suffix("Cava audio visualizer - active")
+            self.standby_suffix = self._json_suffix(
+                "Cava audio visualizer - standby mode"
+            )
+
+    @staticmethod
+    def _escape(text):
+        """JSON escape a string, without the surrounding quotes"""
+        return json.dumps(text)[1:-1]
+
+    @staticmethod
+    def _json_suffix(tooltip):
+        """Closing part of the JSON line that follows the text"""
+        return '", "tooltip": ' + json.dumps(tooltip) + "}"
+
+    @property
+    def key(self):
+        """Hashable identity of the render spec"""
+        return (
+            tuple(self.bar_chars),
+            self.width,
+            self.standby_mode,
+            bool(self.json_output),
+        )
+
+    def _output_line(self, text, standby=False):
+        """Build the final output line, None when it should be suppressed"""
+        if text == "" and self.standby_mode in (0, ""):
+            return None
+        if self.json_output:
+            suffix = self.standby_suffix if standby else self.active_suffix
+            return self.JSON_PREFIX + text + suffix
+        return text
+
+    def standby_line(self):
+        """Output line shown before the first frame arrives"""
+        return self._output_line(self.standby_output, standby=True)
+
+    def format(self, values, resampled=None):
+        """Format a frame of bar values into an output line
+
+        resampled optionally maps widths to the frame already resampled by
+        a CavaResampler, so several specs share one interpolation pass.
+        """
+        if not any(values):
+            text = self.standby_output
+        else:
+            if self.renderer is None or self.renderer.source_bars != len(values):
+                self.renderer = CavaDataParser.get_renderer(
+                    self.glyphs, self.width, len(values)
+                )
+            renderer = self.renderer
+            if resampled is not None and renderer.width in resampled:
+                text = renderer.render_resampled(resampled[renderer.width])
+            else:
+                text = renderer.render(values)
+        return self._output_line(text)
+
+
+class CavaSubscriber:
+    """A connected client socket, its wire protocol and pending output"""
+
+    # Clients that send nothing within this window get the legacy ascii stream
+    HANDSHAKE_TIMEOUT = 0.1
+
+    def __init__(self, sock):
+        self.sock = sock
+        # None until the client subscribed or the handshake window expired
+        self.proto = None
+        self.formatter = None
+        # Client command (waybar, hyprlock, ...) and its command line args,
+        # for render specs that follow Hyde config on reload
+        self.command = None
+        self.command_args = None
+        # CavaPipeline the client streams from once subscribed
+        self.pipeline = None
+        # Frame rate cap asked for on subscribe, 0 for every frame
+        self.max_fps = 0
+        self.handshake_deadline = time.monotonic() + self.HANDSHAKE_TIMEOUT
+        # No byte received yet, only silent clients are auto-subscribed
+        self.silent = True
+        # Subscribed by the handshake timeout rather than by CMD:SUBSCRIBE
+        self.implicit = False
+        self.inbuf = bytearray()
+        # Unsent tail of the frame being written and the newest frame after
+        # it; a client that falls behind only ever holds these two
+        self.outbuf = None
+        self.pending = None
+        # Replies (acks, stats) queued behind the frame being written, these
+        # are never replaced by a newer frame
+        self.control = bytearray()
+        self.writing = False
+        self.closed = False
+        self.dropped = 0
+        # Send latency: queue time of the pending frame and the frame being
+        # written (None while writing a reply), and totals over every fully
+        # written frame
+        self.pending_since = 0.0
+        self.outbuf_since = 0.0
+        self.frames_sent = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    @property
+    def stream_key(self):
+        """Clients with the same key receive the exact same bytes"""
+        key = self.formatter.key if self.proto == "render" else self.proto
+        if self.max_fps:
+            # Capped clients of a spec share one rate gate
+            return (key, self.max_fps)
+        return key
+
+    def stats(self):
+        """Delivery statistics for CMD:STATS"""
+        sent = self.frames_sent
+        return {
+            "proto": self.proto,
+            "max_fps": self.max_fps,
+            "frames_sent": sent,
+            "dropped": self.dropped,
+            "behind": self.writing,
+            "latency_us": {
+                "avg": round(self.latency_total / sent * 1e6, 1) if sent else 0,
+                "max": round(self.latency_max * 1e6, 1),
+            },
+        }
+
+
+class CavaFrameRing:
+    """Shared memory ring of scaled frames for clients on the same machine
+
+    The manager writes every frame into the next slot and then publishes its
+    sequence number in the header, which doubles as a futex word so one wake
+    reaches all waiting readers. Readers copy the newest slot and check its
+    sequence again to detect a frame overwritten while they were reading.
+    """
+
+    MAGIC = b"CVSH"
+    VERSION = 1
+    SLOTS = 8
+    # 512 bars of 16 bit samples
+    CAPACITY = 1024
+    # magic, sequence, version, slot count, slot capacity
+    HEADER = struct.Struct("=4sIBxHH2x")
+    # sequence, bar count, max value, sample width
+    SLOT = struct.Struct("=IHHB3x")
+    SEQ_OFFSET = 4
+    # x86_64 and the generic syscall table used by aarch64 and riscv64
+    SYS_FUTEX = {"x86_64": 202, "aarch64": 98, "riscv64": 98}
+    FUTEX_WAIT = 0
+    FUTEX_WAKE = 1
+    # Polling interval when futexes are not available
+    POLL_INTERVAL = 1 / 60
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        self.name = shm.name
+        self.seq = 0
+        _, _, _, self.slots, self.capacity = self.HEADER.unpack_from(self.buf)
+        self.slot_size = self.SLOT.size + self.capacity
+        self._futex = None
+        self._futex_word = None
+        self._setup_futex()
+
+    @classmethod
+    def create(cls, name):
+        """Create the ring, replacing a stale one left by a crashed manager"""
+        from multiprocessing import shared_memory
+
+        size = cls.HEADER.size + cls.SLOTS * (cls.SLOT.size + cls.CAPACITY)
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        cls.HEADER.pack_into(
+            shm.buf, 0, cls.MAGIC, 0, cls.VERSION, cls.SLOTS, cls.CAPACITY
+        )
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a ring created by the manager"""
+        from multiprocessing import shared_memory
+
+        try:
+            shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 every attach is tracked and the tracker
+            # would unlink the manager's ring when this client exits
+            from multiprocessing import resource_tracker
+
+            shm = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        magic, _, version, _, _ = cls.HEADER.unpack_from(shm.buf)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            shm.close()
+            raise ValueError(f"Unsupported frame ring {name}")
+        return cls(shm, owner=False)
+
+    def _setup_futex(self):
+        """Bind the futex syscall to the header sequence word if possible"""
+        import platform
+
+        number = self.SYS_FUTEX.get(platform.machine())
+        if number is None:
+            return
+        try:
+            import ctypes
+
+            syscall = ctypes.CDLL(None, use_errno=True).syscall
+        except (ImportError, OSError, AttributeError):
+            return
+        self._futex_word = ctypes.c_uint32.from_buffer(self.buf, self.SEQ_OFFSET)
+        address = ctypes.addressof(self._futex_word)
+
+        class Timespec(ctypes.Structure):
+            _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+        def futex(op, value, timeout=None):
+            timespec = None
+            if timeout is not None:
+                timespec = ctypes.byref(
+                    Timespec(int(timeout), int((timeout % 1) * 1e9))
+                )
+            return syscall(
+                ctypes.c_long(number),
+                ctypes.c_void_p(address),
+                ctypes.c_int(op),
+                ctypes.c_uint32(value),
+                timespec,
+                None,
+                ctypes.c_int(0),
+            )
+
+        self._futex = futex
+
+    def sequence(self):
+        """Sequence number of the newest published frame, 0 if none yet"""
+        return struct.unpack_from("=I", self.buf, self.SEQ_OFFSET)[0]
+
+    def write(self, values, sample_width, max_value):
+        """Publish a frame and wake every waiting reader"""
+        data = bytes(values)
+        if len(data) > self.capacity:
+            return
+        seq = (self.seq + 1) & 0xFFFFFFFF or 1
+        offset = self.HEADER.size + (seq % self.slots) * self.slot_size
+        bars = len(data) // sample_width
+        # A zero slot sequence marks the slot as being rewritten
+        self.SLOT.pack_into(self.buf, offset, 0, bars, max_value, sample_width)
+        start = offset + self.SLOT.size
+        self.buf[start : start + len(data)] = data
+        self.SLOT.pack_into(self.buf, offset, seq, bars, max_value, sample_width)
+        struct.pack_into("=I", self.buf, self.SEQ_OFFSET, seq)
+        self.seq = seq
+        if self._futex is not None:
+            self._futex(self.FUTEX_WAKE, 0x7FFFFFFF)
+
+    def read(self):
+        """Copy the newest frame, returns (seq, values) or None if torn"""
+        seq = self.sequence()
+        if not seq:
+            return None
+        offset = self.HEADER.size + (seq % self.slots) * self.slot_size
+        slot_seq, bars, _, sample_width = self.SLOT.unpack_from(self.buf, offset)
+        if slot_seq != seq:
+            return None
+        start = offset + self.SLOT.size
+        data = bytes(self.buf[start : start + bars * sample_width])
+        if struct.unpack_from("=I", self.buf, offset)[0] != seq:
+            return None
+        return seq, data if sample_width == 1 else memoryview(data).cast("H")
+
+    def wait(self, seq, timeout):
+        """Block until the sequence moves past seq or the timeout expires"""
+        if self._futex is not None:
+            self._futex(self.FUTEX_WAIT, seq, timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while self.sequence() == seq and time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+
+    def close(self):
+        """Detach from the ring, the manager also removes it"""
+        # ctypes holds an export of the buffer until released
+        self._futex = None
+        self._futex_word = None
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class CavaPipeline:
+    """One cava process with its capture settings and the clients streaming it"""
+
+    FRAME_TIME_SAMPLES = 1024
+
+    def __init__(self, server, frame_format, follows_config=False):
+        self.server = server
+        # (bars, range, channels) the pipeline was created for
+        self.frame_format = frame_format
+        # The pipeline of clients that ask for no capture settings follows
+        # CAVA_BARS, CAVA_RANGE and CAVA_CHANNELS on reload
+        self.follows_config = follows_config
+        if follows_config:
+            self.config_file = server.temp_dir / "cava.manager.conf"
+            self.ring_name = f"hyde-cava-{os.getuid()}"
+        else:
+            bars, range_val, channels = frame_format
+            suffix = f"{bars}-{range_val}-{channels}"
+            self.config_file = server.temp_dir / f"cava.manager.{suffix}.conf"
+            self.ring_name = f"hyde-cava-{os.getuid()}-{suffix}"
+        self.clients = []
+        self.frame_ring = None
+        self.stopped = False
+
+        self.cava_process = None
+        self.cava_buffer = bytearray()
+        # Reloads that change the frame size start a second cava, which
+        # replaces the running one once it streams
+        self.next_process = None
+        self.next_buffer = bytearray()
+        self.next_format = None
+        self.next_deadline = 0.0
+        self.cava_config_text = ""
+        self.consecutive_zero_count = 0
+        self.zero_threshold = 50
+        # Adaptive frame rate: full rate while audio plays, idle_framerate
+        # after idle_frames silent frames and a stopped cava (woken up every
+        # probe_interval to check for audio) after pause_after seconds
+        self.adaptive = True
+        self.framerate = 60
+        self.idle_framerate = 10
+        self.idle_frames = 120
+        self.pause_after = 10.0
+        self.probe_interval = 1.0
+        self.activity = "active"
+        self.cava_framerate = self.framerate
+        self.cava_config_args = ()
+        self.last_audio_time = time.monotonic()
+        self.probe_deadline = 0.0
+        self.frame_seq = 0
+        # Delta suppression: frames equal to the last broadcast one, or whose
+        # largest per-bar change is below delta_threshold, are not sent
+        self.delta_threshold = 0
+        self.last_values = None
+        self.last_rendered = {}
+        self.frames_suppressed = 0
+        # Smoothing, gravity and normalization from CAVA_* keys
+        self.processor = CavaFrameProcessor()
+        # Per client frame rate caps: when a capped stream may send next and
+        # the newest frame it skipped, sent once its gate opens
+        self.stream_gates = {}
+        self.held_frames = {}
+        # Counters for CMD:STATS, frame_times keeps the handling time of the
+        # last FRAME_TIME_SAMPLES frames
+        self.frames_in = 0
+        self.frames_out = 0
+        self.cava_restarts = 0
+        self.frame_times = []
+        self.frame_time_index = 0
+        # Shared formatters for server side rendering, keyed by render spec
+        self.render_groups = {}
+        # Batched interpolation for all widths in render_groups
+        self.resampler = None
+
+    @property
+    def label(self):
+        """Human readable capture settings"""
+        bars, range_val, channels = self.frame_format
+        return f"{bars} bars, range {range_val}, {channels}"
+
+    def start(self, reverse=0):
+        """Write the cava config and start cava, raises FileNotFoundError"""
+        self._create_cava_config(*self.frame_format, reverse)
+        print(f"Starting cava ({self.label}) with config: {self.config_file}")
+        self._spawn_cava()
+
+    def stop(self):
+        """Stop cava and release the frame ring"""
+        self.stopped = True
+        for process in (self.cava_process, self.next_process):
+            if process:
+                self.server._retire_cava(process)
+        self.cava_process = self.next_process = None
+        if self.frame_ring:
+            self.frame_ring.close()
+            self.frame_ring = None
+
+    def add_client(self, client, proto, request):
+        """Attach a subscribed client, returns the protocol it gets"""
+        if proto == "shm":
+            if self.frame_ring is None:
+                self._open_frame_ring()
+            if self.frame_ring is None:
+                # The client sees a binary frame instead of the ack
+                proto = "binary"
+            else:
+                self.server._send_control(
+                    client, SHM_ACK + self.frame_ring.name.encode("utf-8") + b"\n"
+                )
+        if proto == "render":
+            formatter = CavaFrameFormatter(
+                request.get("bar_chars") or "▁▂▃▄▅▆▇█",
+                request.get("width"),
+                request.get("standby", 0),
+                request.get("json", False),
+            )
+            # Lets a reload re-derive the spec from the client's config keys
+            if isinstance(request.get("command"), str):
+                client.command = request["command"]
+                client.command_args = {
+                    name: (request.get("args") or {}).get(name)
+                    for name in ("bar", "bar_array", "width", "stb", "fps")
+                }
+            self._join_render_group(client, formatter)
+            self.server._send_control(client, RENDER_ACK)
+        # shm clients read the ring themselves and apply their cap locally
+        client.max_fps = 0 if proto == "shm" else self._parse_fps(request.get("fps"))
+        client.pipeline = self
+        if client not in self.clients:
+            self.clients.append(client)
+        # Make sure the newcomer gets the next frame even if nothing changed
+        self.last_values = None
+        return proto
+
+    def remove_client(self, client):
+        """Detach a client that left or moved to another pipeline"""
+        if client.proto == "render" and client.formatter:
+            self._leave_render_group(client)
+        if client in self.clients:
+            self.clients.remove(client)
+        if client.max_fps and client.proto:
+            self._drop_gate(client.stream_key, client)
+        client.pipeline = None
+
+    @staticmethod
+    def _parse_fps(value):
+        """Validate the fps cap of a subscribe request, 0 when uncapped"""
+        try:
+            fps = float(value or 0)
+        except (TypeError, ValueError):
+            return 0
+        if fps <= 0:
+            return 0
+        return int(fps) if fps.is_integer() else fps
+
+    def _drop_gate(self, key, leaving=None):
+        """Forget the rate gate of a stream once no other client uses it"""
+        if not any(
+            other is not leaving and other.proto and other.stream_key == key
+            for other in self.clients
+        ):
+            self.stream_gates.pop(key, None)
+            self.held_frames.pop(key, None)
+
+    def _pass_gate(self, key, fps, values, now):
+        """Rate limit a capped stream, holding back the frame it skips"""
+        due = self.stream_gates.get(key, 0.0)
+        if now < due:
+            self.held_frames[key] = values
+            return False
+        interval = 1.0 / fps
+        # Keeps the average rate without bursting after a quiet spell
+        self.stream_gates[key] = max(due, now - interval) + interval
+        self.held_frames.pop(key, None)
+        return True
+
+    def _send_held_frames(self, now):
+        """Send the newest skipped frame of capped streams whose gate opened"""
+        for key in [k for k in self.held_frames if now >= self.stream_gates[k]]:
+            self._send_to_clients(self.held_frames.pop(key), None, now, key)
+
+    def held_timeout(self, now):
+        """Seconds until the next held frame is due, None when none is held"""
+        if not self.held_frames:
+            return None
+        return max(0.0, min(self.stream_gates[k] for k in self.held_frames) - now)
+
+    def _open_frame_ring(self):
+        """Create the shared memory ring on the first shm subscription"""
+        try:
+            self.frame_ring = CavaFrameRing.create(self.ring_name)
+            print(f"Shared memory frame ring: /dev/shm/{self.ring_name}")
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Warning: Could not create shared memory frame ring: {e}")
+
+    def _encode_frame(self, values, client, resampled=None):
+        """Encode a frame of scaled bar values for a client's wire protocol"""
+        proto = client.proto
+        if proto == "render":
+            line = client.formatter.format(values, resampled)
+            return b"" if line is None else (line + "\n").encode("utf-8")
+        if proto == "shm":
+            # Written once for all shm clients, nothing goes over the socket
+            self.frame_ring.write(values, self.sample_width, self.range_val)
+            return b""
+        if proto == "binary":
+            return FRAME_HEADER.pack(
+                FRAME_MAGIC,
+                FRAME_VERSION,
+                self.sample_width,
+                len(values),
+                self.range_val,
+                self.frame_seq & 0xFFFFFFFF,
+            ) + bytes(values)
+        return ("".join(map(self._ascii_table.__getitem__, values)) + "\n").encode(
+            "utf-8"
+        )
+
+    def _is_redundant(self, values):
+        """Check whether a frame is too close to the last broadcast one"""
+        last = self.last_values
+        if last is None or len(last) != len(values):
+            return False
+        if values == last:
+            return True
+        # Falling silent is always sent, so bars never hang above zero
+        if self.delta_threshold <= 0 or not any(values):
+            return False
+        threshold = self.delta_threshold
+        return all(abs(a - b) < threshold for a, b in zip(values, last))
+
+    def _broadcast_data(self, values):
+        """Queue a frame for all clients of the pipeline, encoding once per stream"""
+        if self._is_redundant(values):
+            self.frames_suppressed += 1
+            return
+        self.last_values = values
+        self.frame_seq += 1
+        self.frames_out += 1
+        resampled = None
+        if self.render_groups and any(values):
+            resampled = self._resample_for_groups(values)
+        self._send_to_clients(values, resampled, time.monotonic())
+
+    def _send_to_clients(self, values, resampled, now, only=None):
+        """Encode a frame once per stream and queue it, only for one stream"""
+        encoded = {}
+        for client in self.clients[:]:
+            if client.proto is None or client.closed:
+                continue
+            key = client.stream_key
+            if only is not None and key != only:
+                continue
+            data = encoded.get(key)
+            if data is None:
+                if client.max_fps and not self._pass_gate(
+                    key, client.max_fps, values, now
+                ):
+                    data = encoded[key] = b""
+                else:
+                    data = encoded[key] = self._encode_frame(values, client, resampled)
+                if client.proto == "render" and data:
+                    # Different values often render to the same line
+                    if data == self.last_rendered.get(key):
+                        data = encoded[key] = b""
+                    else:
+                        self.last_rendered[key] = data
+            if data:
+                self.server._send_frame(client, data)
+
+    def _resample_for_groups(self, values):
+        """Resample a frame once for every width the render groups use"""
+        resampler = self.resampler
+        if resampler is None or resampler.source_bars != len(values):
+            widths = {
+                formatter.width or len(values)
+                for formatter in self.render_groups.values()
+            }
+            resampler = self.resampler = CavaResampler(len(values), widths)
+        return resampler.resample(values)
+
+    def _join_render_group(self, client, formatter):
+        """Attach a render client to the shared formatter of its spec"""
+        # Clients with identical specs share one formatter
+        client.formatter = self.render_groups.setdefault(formatter.key, formatter)
+        # Rendered lines are remembered per stream, capped or not
+        self.last_rendered.clear()
+        self.resampler = None
+
+    def _leave_render_group(self, client):
+        """Detach a render client, dropping its group when it was the last"""
+        key = client.formatter.key
+        if not any(
+            other is not client
+            and other.proto == "render"
+            and other.formatter.key == key
+            for other in self.clients
+        ):
+            self.render_groups.pop(key, None)
+            self.last_rendered.clear()
+            self.resampler = None
+
+    def read_cava(self, pipe):
+        """Read available cava output and handle every complete frame"""
+        if self.next_process and pipe is self.next_process.stdout:
+            self._read_next_cava()
+            return
+        try:
+            chunk = os.read(pipe.fileno(), 65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        if not chunk:
+            self.server._unwatch_cava(self.cava_process)
+            if self.next_process:
+                self._promote_next_cava()
+                return
+            print(f"Cava process ({self.label}) exited, closing its clients.")
+            for client in self.clients[:]:
+                self.server._remove_client(client)
+            return
+
+        self.cava_buffer += chunk
+        self._handle_cava_buffer()
+
+    def _handle_cava_buffer(self):
+        """Handle every complete frame in the cava buffer"""
+        buffer = self.cava_buffer
+        frame_size = self.cava_frame_size
+        perf_counter = time.perf_counter
+        while len(buffer) >= frame_size and not self.stopped:
+            start = perf_counter()
+            raw = bytes(buffer[:frame_size])
+            del buffer[:frame_size]
+            self._handle_frame(raw)
+            self._record_frame_time(perf_counter() - start)
+
+    def _record_frame_time(self, elapsed):
+        """Count a frame from cava and keep its handling time"""
+        self.frames_in += 1
+        if len(self.frame_times) < self.FRAME_TIME_SAMPLES:
+            self.frame_times.append(elapsed)
+        else:
+            self.frame_times[self.frame_time_index] = elapsed
+            self.frame_time_index = (self.frame_time_index + 1) % len(self.frame_times)
+
+    def stats(self):
+        """Pipeline statistics for CMD:STATS"""
+        bars, range_val, channels = self.frame_format
+        return {
+            "bars": self.bar_count,
+            "range": range_val,
+            "channels": channels,
+            "follows_config": self.follows_config,
+            "activity": self.activity,
+            "framerate": self.cava_framerate,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "frames_suppressed": self.frames_suppressed,
+            "cava_restarts": self.cava_restarts,
+            "frame_time_us": percentiles(self.frame_times),
+            "clients": [client.stats() for client in self.clients],
+        }
+
+    def _handle_frame(self, raw):
+        """Scale a raw cava frame, run it through the processor and broadcast it"""
+        values = output = self._scale_frame(raw)
+        if self.processor.enabled:
+            output = self.processor.process(values, time.monotonic(), self.range_val)
+        if not any(values):
+            self.consecutive_zero_count += 1
+            # Bars falling back under gravity keep going out after silence
+            if self.consecutive_zero_count <= self.zero_threshold or any(output):
+                self._broadcast_data(output)
+            # While a replacement cava starts, the config file no longer
+            # matches the running one and must not be reloaded into it
+            if self.adaptive and not self.next_process:
+                if self.activity == "probing":
+                    self._set_activity("paused")
+                elif (
+                    self.activity == "active"
+                    and self.consecutive_zero_count >= self.idle_frames
+                ):
+                    self._set_activity("idle")
+        else:
+            self.consecutive_zero_count = 0
+            self.last_audio_time = time.monotonic()
+            if self.activity != "active" and not self.next_process:
+                self._set_activity("active")
+            self._broadcast_data(output)
+
+    def _set_activity(self, activity):
+        """Switch cava between the active, idle, paused and probing states"""
+        previous = self.activity
+        self.activity = activity
+        process = self.cava_process
+        if not process or process.poll() is not None:
+            return
+        now = time.monotonic()
+        if activity == "paused":
+            process.send_signal(signal.SIGSTOP)
+            self.probe_deadline = now + self.probe_interval
+            return
+        if activity == "probing":
+            process.send_signal(signal.SIGCONT)
+            # Long enough for a few frames at the idle rate
+            self.probe_deadline = now + max(0.3, 3 / self.idle_framerate)
+            return
+
+        if previous == "paused":
+            process.send_signal(signal.SIGCONT)
+        framerate = self.framerate if activity == "active" else self.idle_framerate
+        if framerate != self.cava_framerate:
+            # cava re-reads its config on SIGUSR1 without dropping capture
+            self._create_cava_config(*self.cava_config_args)
+            process.send_signal(signal.SIGUSR1)
+        print(f"Cava ({self.label}) {activity}, {framerate} fps")
+
+    def check_timers(self):
+        """Send held frames and advance the idle and replacement timers"""
+        now = time.monotonic()
+        if self.held_frames:
+            self._send_held_frames(now)
+        if self.next_process:
+            if now >= self.next_deadline:
+                print("Replacement cava sent nothing yet, switching over anyway.")
+                self._promote_next_cava()
+            return
+        if not self.adaptive:
+            return
+        if self.activity == "idle" and now - self.last_audio_time >= self.pause_after:
+            self._set_activity("paused")
+        elif self.activity in ("paused", "probing") and now >= self.probe_deadline:
+            # A probe without audio pauses again, a pause ends in a probe
+            self._set_activity("probing" if self.activity == "paused" else "paused")
+
+    def _spawn_next_cava(self, frame_format):
+        """Start a replacement cava with the new config next to the running one"""
+        if self.next_process:
+            self.server._retire_cava(self.next_process)
+        self.next_process = subprocess.Popen(
+            ["cava", "-p", str(self.config_file)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.next_buffer = bytearray()
+        self.next_format = frame_format
+        self.next_deadline = time.monotonic() + 2
+        self.server._watch_cava(self.next_process, self)
+
+    def _read_next_cava(self):
+        """Buffer output of the replacement cava, switch over once it streams"""
+        process = self.next_process
+        try:
+            chunk = os.read(process.stdout.fileno(), 65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        if not chunk:
+            print("Replacement cava exited, keeping the running one.")
+            self.next_process = None
+            self.server._retire_cava(process)
+            return
+        self.next_buffer += chunk
+        self._promote_next_cava()
+
+    def _promote_next_cava(self):
+        """Make the replacement cava the running one"""
+        if self.cava_process:
+            self.server._retire_cava(self.cava_process)
+        self.cava_process, self.next_process = self.next_process, None
+        self.cava_buffer, self.next_buffer = self.next_buffer, bytearray()
+        self._set_frame_format(*self.next_format)
+        self.cava_restarts += 1
+        print(f"Switched to new cava process ({self.bar_count} bars).")
+        self._handle_cava_buffer()
+
+    def reload(self, hyde_config, frame_format, reverse):
+        """Apply the latest config, touching only what actually changed
+
+        Render specs and manager side settings apply from the next frame,
+        cava re-reads a changed config on SIGUSR1 and only a new frame size
+        needs a second cava that takes over once it streams.
+        """
+        process = self.cava_process
+        if not process or process.poll() is not None:
+            if process:
+                self.server._retire_cava(process)
+            self.activity = "active"
+            self._create_cava_config(*frame_format, reverse)
+            try:
+                self._spawn_cava()
+                self.cava_restarts += 1
+                print("Cava process restarted.")
+            except FileNotFoundError:
+                print("Error: cava not found. Please install cava.")
+            return
+
+        # Wake cava up, a reload usually means someone is looking
+        if self.activity in ("paused", "probing"):
+            process.send_signal(signal.SIGCONT)
+        self.activity = "active"
+        self.consecutive_zero_count = 0
+        self.last_audio_time = time.monotonic()
+
+        old_format, old_config = self.current_format, self.cava_config_text
+        self._create_cava_config(*frame_format, reverse)
+        new_format = self.current_format
+        if self._frame_geometry(*new_format) != self._frame_geometry(*old_format):
+            # Frames in the pipe keep the old size until the new cava streams
+            self._set_frame_format(*old_format)
+            try:
+                self._spawn_next_cava(new_format)
+                print("Starting cava with the new frame size...")
+            except FileNotFoundError:
+                print("Error: cava not found. Please install cava.")
+        elif self.cava_config_text != old_config:
+            process.send_signal(signal.SIGUSR1)
+            print(f"Cava config ({self.label}) reloaded in place.")
+
+        if self._reload_render_specs(hyde_config) and self.last_values is not None:
+            # Show the new look right away, even while there is no audio
+            values, self.last_values = self.last_values, None
+            self._broadcast_data(values)
+
+    def _reload_render_specs(self, hyde_config):
+        """Re-derive render specs that come from Hyde config, True if any changed"""
+        changed = False
+        for client in self.clients:
+            if client.proto != "render" or not client.command:
+                continue
+            args = argparse.Namespace(**client.command_args)
+            bar_chars, width, standby_mode = CavaClient.parse_command_config(
+                hyde_config, client.command, args
+            )
+            max_fps = self._parse_fps(
+                CavaClient.parse_command_fps(hyde_config, client.command, args)
+            )
+            if max_fps != client.max_fps:
+                self._drop_gate(client.stream_key, client)
+                client.max_fps = max_fps
+                changed = True
+            formatter = CavaFrameFormatter(
+                bar_chars, width, standby_mode, client.formatter.json_output
+            )
+            if formatter.key != client.formatter.key:
+                self._leave_render_group(client)
+                self._join_render_group(client, formatter)
+                changed = True
+        return changed
+
+    def _spawn_cava(self):
+        """Start cava with the current config in binary raw output mode"""
+        self.cava_process = subprocess.Popen(
+            ["cava", "-p", str(self.config_file)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.cava_buffer.clear()
+        self.server._watch_cava(self.cava_process, self)
+
+    def _create_cava_config(
+        self, bars=16, range_val=15, channels="stereo", reverse=0, prefix=""
+    ):
+        """Create cava configuration file with reverse support, using HydeConfig with or without prefix as appropriate"""
+        hyde_config = HydeConfig()
+
+        reverse_key = f"CAVA_{prefix}_REVERSE" if prefix else "CAVA_REVERSE"
+        reverse = int(hyde_config.get_bool(reverse_key, bool(reverse)))
+        self._load_adaptive_settings(hyde_config)
+        self.delta_threshold = max(0, hyde_config.get_int("CAVA_DELTA_THRESHOLD", 0))
+        self._load_processor_settings(hyde_config)
+        self.cava_config_args = (bars, range_val, channels, reverse, prefix)
+        self.cava_framerate = (
+            self.framerate if self.activity == "active" else self.idle_framerate
+        )
+
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+
+        bit_format = self._set_frame_format(bars, range_val, channels)
+
+        # The adaptive mode does its own idle handling, cava's sleep timer
+        # would stop frames and hide audio from the probes
+        sleep_timer = 0 if self.adaptive else 1
+
+        config_content = f"""[general]
+bars = {bars}
+framerate = {self.cava_framerate}
+sleep_timer = {sleep_timer}
+
+[input]
+method = pulse
+source = auto
+
+[output]
+method = raw
+raw_target = /dev/stdout
+data_format = binary
+bit_format = {bit_format}bit
+channels = {channels}
+reverse = {reverse}
+"""
+
+        with open(self.config_file, "w") as f:
+            f.write(config_content)
+        self.cava_config_text = config_content
+
+    def _load_adaptive_settings(self, hyde_config):
+        """Read the adaptive frame rate settings from Hyde config"""
+        self.adaptive = hyde_config.get_bool("CAVA_ADAPTIVE", True)
+        for attr, key, get in (
+            ("framerate", "CAVA_FRAMERATE", hyde_config.get_int),
+            ("idle_framerate", "CAVA_IDLE_FRAMERATE", hyde_config.get_int),
+            ("idle_frames", "CAVA_IDLE_FRAMES", hyde_config.get_int),
+            ("pause_after", "CAVA_PAUSE_AFTER", hyde_config.get_float),
+        ):
+            value = get(key, getattr(self, attr))
+            if value > 0:
+                setattr(self, attr, value)
+
+    def _load_processor_settings(self, hyde_config):
+        """Read the smoothing, gravity and normalization settings"""
+        self.processor.configure(
+            smoothing=hyde_config.get_float("CAVA_SMOOTHING"),
+            gravity=hyde_config.get_float("CAVA_GRAVITY"),
+            peak_hold=hyde_config.get_float("CAVA_PEAK_HOLD"),
+            normalize=hyde_config.get_float("CAVA_NORMALIZE"),
+        )
+
+    def _set_frame_format(self, bars, range_val, channels):
+        """Set up frame size and scaling tables, returns cava's bit format"""
+        # cava emits fixed size binary frames; they are scaled to range_val
+        # here, so 8 bit samples are enough for any usual range
+        bit_format = 8 if range_val <= 255 else 16
+        self.current_format = (bars, range_val, channels)
+        if self.follows_config:
+            self.frame_format = self.current_format
+        self.range_val = range_val
+        self.bar_count = self._cava_bar_count(bars, channels)
+        self.sample_width = bit_format // 8
+        self.cava_frame_size = self.bar_count * self.sample_width
+        if bit_format == 8:
+            self._scale_table = bytes((v * range_val) // 255 for v in range(256))
+        self._ascii_table = tuple(f"{v};" for v in range(range_val + 1))
+        return bit_format
+
+    @classmethod
+    def _frame_geometry(cls, bars, range_val, channels):
+        """Bars and sample width of the frames cava emits for a format"""
+        return cls._cava_bar_count(bars, channels), 1 if range_val <= 255 else 2
+
+    @staticmethod
+    def _cava_bar_count(bars, channels):
+        """Number of bars cava actually emits per frame for a bars setting"""
+        bars = max(1, min(int(bars), 512))
+        if channels == "stereo":
+            # stereo needs at least two bars and an even count
+            bars = max(2, bars - bars % 2)
+        return bars
+
+    def _scale_frame(self, raw):
+        """Scale a raw binary cava frame to 0..range_val"""
+        if self.sample_width == 1:
+            return raw.translate(self._scale_table)
+        range_val = self.range_val
+        return array("H", [(v * range_val) // 65535 for v in memoryview(raw).cast("H")])
+
+
 class CavaServer:
-    """Cava server that manages the cava process and broadcasts to clients"""
+    """Cava server that runs cava pipelines and broadcasts to clients"""
 
     def __init__(self):
         self.runtime_dir = os.getenv(
@@ -146,52 +1434,71 @@ class CavaServer:
         self.socket_file = os.path.join(self.runtime_dir, "hyde", "cava.sock")
         self.pid_file = os.path.join(self.runtime_dir, "hyde", "cava.pid")
         self.temp_dir = Path(os.path.join(self.runtime_dir, "hyde"))
-        self.config_file = self.temp_dir / "cava.manager.conf"
 
         self.clients = []
-        self.clients_lock = threading.Lock()
-        self.cava_process = None
+        self.selector = None
+        # Pipelines keyed by (bars, range, channels), None for the one of
+        # clients that ask for no capture settings
+        self.pipelines = {}
+        self.default_format = (16, 15, "stereo")
+        self.default_reverse = 0
+        # Replaced or stopped cava processes, reaped from the event loop
+        self.retired_processes = []
         self.server_socket = None
+        self.owns_socket_file = True
         self.cleanup_registered = False
         self.successfully_started = False
-        self.consecutive_zero_count = 0
-        self.zero_threshold = 50
+        self.started_at = time.monotonic()
         self.last_client_time = time.time()
         self.should_shutdown = False
 
     def _signal_handler(self, signum, frame):
-        """Handle signals gracefully"""
-        self.cleanup()
-        sys.exit(0)
+        """Handle signals gracefully, the event loop exits on its next pass"""
+        self.should_shutdown = True
 
     def cleanup(self):
         """Cleanup function called on exit"""
-        if not (
-            self.successfully_started and (self.server_socket or self.cava_process)
-        ):
+        if not (self.successfully_started and self.server_socket):
             return
 
         print(f"Shutting down cava manager (PID: {os.getpid()})...")
 
-        if self.cava_process and self.cava_process.poll() is None:
-            self.cava_process.terminate()
+        for pipeline in list(self.pipelines.values()):
+            if pipeline.frames_suppressed:
+                print(
+                    f"Suppressed {pipeline.frames_suppressed} unchanged frames"
+                    f" ({pipeline.label})"
+                )
+            pipeline.stop()
+        self.pipelines.clear()
+        for process, _ in self.retired_processes:
+            if process.poll() is None:
+                try:
+                    process.wait(timeout=3)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+        self.retired_processes.clear()
+
+        for client in self.clients[:]:
             try:
-                self.cava_process.wait(timeout=3)
-            except subprocess.TimeoutExpired:
-                self.cava_process.kill()
+                client.sock.close()
+            except Exception:
+                pass
+        self.clients.clear()
 
-        with self.clients_lock:
-            for client_socket in self.clients[:]:
-                try:
-                    client_socket.close()
-                except Exception:
-                    pass
-            self.clients.clear()
+        if self.selector:
+            self.selector.close()
+            self.selector = None
 
         if self.server_socket:
             self.server_socket.close()
 
-        if self.server_socket and os.path.exists(self.socket_file):
+        if (
+            self.server_socket
+            and self.owns_socket_file
+            and os.path.exists(self.socket_file)
+        ):
             owns_pid_file = False
             if os.path.exists(self.pid_file):
                 try:
@@ -217,6 +1524,23 @@ class CavaServer:
 
         print("Cleanup complete.")
 
+    @staticmethod
+    def _inherited_socket():
+        """Return the listening socket passed by systemd socket activation"""
+        if os.getenv("LISTEN_PID") != str(os.getpid()):
+            return None
+        try:
+            fds = int(os.getenv("LISTEN_FDS", "0"))
+        except ValueError:
+            fds = 0
+        # cava must not think the sockets were meant for it
+        for name in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+            os.environ.pop(name, None)
+        if fds < 1:
+            return None
+        # SD_LISTEN_FDS_START
+        return socket.socket(fileno=3)
+
     def _write_pid_file(self):
         """Write PID file to prevent multiple managers"""
         self.temp_dir.mkdir(parents=True, exist_ok=True)
@@ -258,192 +1582,361 @@ class CavaServer:
 
         return False
 
-    def _check_auto_shutdown(self):
-        """Check if manager should auto-shutdown when no clients are connected"""
-        while not self.should_shutdown:
-            time.sleep(1)
-            with self.clients_lock:
-                if not self.clients and time.time() - self.last_client_time > 1:
-                    print("No clients connected for 5 seconds, shutting down...")
-                    self.should_shutdown = True
-                    break
-
-    def _broadcast_data(self, data):
-        """Broadcast data to all connected clients"""
-        with self.clients_lock:
-            disconnected_clients = []
-            for client_socket in self.clients:
-                try:
-                    client_socket.sendall(data)
-                except (BrokenPipeError, ConnectionResetError, OSError):
-                    disconnected_clients.append(client_socket)
-
-            for client in disconnected_clients:
-                try:
-                    client.close()
-                except Exception:
-                    pass
-                if client in self.clients:
-                    self.clients.remove(client)
-
-            # If no clients remain, trigger shutdown immediately
-            if not self.clients and not self.should_shutdown:
-                print("All clients disconnected, shutting down cava manager.")
-                self.should_shutdown = True
-                # Terminate cava process to unblock main loop
-                if self.cava_process and self.cava_process.poll() is None:
-                    try:
-                        self.cava_process.terminate()
-                    except Exception:
-                        pass
-
-    def _handle_client_connections(self):
-        """Handle incoming client connections and listen for reload command"""
-        while not self.should_shutdown:
+    def _send_frame(self, client, data):
+        """Send a frame to a client, latest frame wins when it falls behind"""
+        if client.pending is not None:
+            client.dropped += 1
+        client.pending = data
+        client.pending_since = time.perf_counter()
+        if not client.writing:
+            self._flush_client(client)
+
+    def _send_control(self, client, data):
+        """Queue a reply after the frame being written, it is never dropped"""
+        client.control += data
+        if not client.writing:
+            self._flush_client(client)
+
+    def _flush_client(self, client):
+        """Write as much pending data as the socket takes without blocking"""
+        while client.outbuf or client.control or client.pending is not None:
+            if not client.outbuf:
+                if client.control:
+                    # Replies go ahead of the newest frame
+                    client.outbuf = memoryview(bytes(client.control))
+                    client.outbuf_since = None
+                    client.control.clear()
+                else:
+                    client.outbuf = memoryview(client.pending)
+                    client.outbuf_since = client.pending_since
+                    client.pending = None
             try:
-                conn, addr = self.server_socket.accept()
-                print("New client connected")
-                threading.Thread(
-                    target=self._client_command_listener, args=(conn,), daemon=True
-                ).start()
-                with self.clients_lock:
-                    self.clients.append(conn)
-                    self.last_client_time = time.time()
-            except OSError:
+                sent = client.sock.send(client.outbuf)
+            except BlockingIOError:
                 break
-
-    def _client_command_listener(self, conn):
-        """Listen for special commands from a client (e.g., reload)"""
+            except OSError:
+                self._remove_client(client)
+                return
+            client.outbuf = client.outbuf[sent:]
+            if not client.outbuf and client.outbuf_since is not None:
+                latency = time.perf_counter() - client.outbuf_since
+                client.frames_sent += 1
+                client.latency_total += latency
+                if latency > client.latency_max:
+                    client.latency_max = latency
+
+        writing = (
+            bool(client.outbuf) or bool(client.control) or client.pending is not None
+        )
+        if writing != client.writing:
+            events = selectors.EVENT_READ
+            if writing:
+                events |= selectors.EVENT_WRITE
+            self.selector.modify(client.sock, events, client)
+            client.writing = writing
+
+    def _remove_client(self, client):
+        """Close and forget a client"""
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.remove(client)
         try:
-            conn.settimeout(0.1)
-            data = b""
-            while True:
-                try:
-                    chunk = conn.recv(1024)
-                    if not chunk:
-                        break
-                    data += chunk
-                    if b"\n" in data:
-                        line, data = data.split(b"\n", 1)
-                        if line.strip() == b"CMD:RELOAD":
-                            print("Received reload command from client.")
-                            self._reload_cava_process()
-                except socket.timeout:
-                    break
-        except Exception:
+            self.selector.unregister(client.sock)
+        except (KeyError, ValueError):
             pass
-
-    def _reload_cava_process(self):
-        """Restart cava process and reload config with latest values"""
-        print("Reloading cava process...")
-        if self.cava_process and self.cava_process.poll() is None:
-            self.cava_process.terminate()
-            try:
-                self.cava_process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                self.cava_process.kill()
-        # Always use latest config values
-        hyde_config = HydeConfig()
-        bars = int(hyde_config.get_value("CAVA_BARS", 16))
-        range_val = int(hyde_config.get_value("CAVA_RANGE", 15))
-        channels = hyde_config.get_value("CAVA_CHANNELS", "stereo")
-        reverse = hyde_config.get_value("CAVA_REVERSE", 0)
         try:
-            reverse = int(reverse)
+            client.sock.close()
         except Exception:
-            reverse = 1 if str(reverse).lower() in ("true", "yes", "on") else 0
-        self._create_cava_config(bars, range_val, channels, reverse)
+            pass
+        if client.dropped:
+            print(f"Client disconnected, {client.dropped} frames dropped while behind")
+        if client.pipeline:
+            self._leave_pipeline(client)
+
+        # If the last streaming client just left, shut down immediately
+        if client.proto is not None and not self.clients:
+            print("All clients disconnected, shutting down cava manager.")
+            self.should_shutdown = True
+
+    def _pipeline_key(self, request):
+        """Pipeline key for the capture settings a client asked for"""
+        if request.get("bars") is None and request.get("range") is None:
+            return None
+        hyde_config = HydeConfig()
+        default_bars, default_range, channels = self.default_format
+        config_channels = hyde_config.get_value("CAVA_CHANNELS")
+        if request.get("channels") in ("mono", "stereo"):
+            channels = request["channels"]
+        elif config_channels in ("mono", "stereo"):
+            channels = config_channels
         try:
-            self.cava_process = subprocess.Popen(
-                ["cava", "-p", str(self.config_file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
+            bars = int(request.get("bars") or default_bars)
+            range_val = max(1, int(request.get("range") or default_range))
+        except (TypeError, ValueError):
+            return None
+        # Settings that make cava emit the same frames share one pipeline
+        return (CavaPipeline._cava_bar_count(bars, channels), range_val, channels)
+
+    def _subscribe_client(self, client, request):
+        """Apply a CMD:SUBSCRIBE json request to a client"""
+        proto = request.get("proto", "ascii")
+        if proto not in ("ascii", "binary", "render", "shm"):
+            proto = "ascii"
+        key = self._pipeline_key(request)
+        pipeline = self.pipelines.get(key)
+        if pipeline is None:
+            pipeline = CavaPipeline(
+                self, key or self.default_format, follows_config=key is None
             )
-            print("Cava process restarted.")
-        except FileNotFoundError:
-            print("Error: cava not found. Please install cava.")
-
-    def _create_cava_config(
-        self, bars=16, range_val=15, channels="stereo", reverse=0, prefix=""
-    ):
-        """Create cava configuration file with channels and reverse support, using HydeConfig with or without prefix as appropriate"""
-        hyde_config = HydeConfig()
+            try:
+                pipeline.start(self.default_reverse)
+            except FileNotFoundError:
+                print("Error: cava not found. Please install cava.")
+                self._remove_client(client)
+                return
+            self.pipelines[key] = pipeline
+        if client.pipeline and client.pipeline is not pipeline:
+            self._leave_pipeline(client)
+        client.proto = pipeline.add_client(client, proto, request)
+        client.implicit = False
+
+    def _leave_pipeline(self, client):
+        """Detach a client from its pipeline, stopping it when it was the last"""
+        pipeline = client.pipeline
+        pipeline.remove_client(client)
+        if pipeline.clients:
+            return
+        print(f"Last client of cava ({pipeline.label}) left, stopping it.")
+        pipeline.stop()
+        for key, other in list(self.pipelines.items()):
+            if other is pipeline:
+                del self.pipelines[key]
+
+    def _accept_clients(self):
+        """Accept all pending connections on the listening socket"""
+        while True:
+            try:
+                conn, addr = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            print("New client connected")
+            conn.setblocking(False)
+            client = CavaSubscriber(conn)
+            self.clients.append(client)
+            self.selector.register(conn, selectors.EVENT_READ, client)
+            self.last_client_time = time.time()
+
+    def _read_client(self, client):
+        """Read and handle commands sent by a client"""
+        try:
+            chunk = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:
+            self._remove_client(client)
+            return
 
-        if prefix:
-            config_channels = hyde_config.get_value(f"CAVA_{prefix}_CHANNELS")
-            config_reverse = hyde_config.get_value(f"CAVA_{prefix}_REVERSE")
-        else:
-            config_channels = hyde_config.get_value("CAVA_CHANNELS")
-            config_reverse = hyde_config.get_value("CAVA_REVERSE")
-        if config_channels in ("mono", "stereo"):
-            channels = config_channels
-        if config_reverse is not None:
+        client.silent = False
+        client.inbuf += chunk
+        while not client.closed:
+            end = client.inbuf.find(b"\n")
+            if end < 0:
+                break
+            line = bytes(client.inbuf[:end]).strip()
+            del client.inbuf[: end + 1]
+            self._handle_command(client, line)
+        if len(client.inbuf) > 65536:
+            client.inbuf.clear()
+
+    def _handle_command(self, client, line):
+        """Handle one command line sent by a client (e.g., subscribe, reload)"""
+        if line == b"CMD:RELOAD":
+            print("Received reload command from client.")
+            self._release_implicit(client)
+            self._reload_pipelines()
+        elif line == b"CMD:STATS":
+            self._release_implicit(client)
+            self._send_control(client, json.dumps(self.stats()).encode("utf-8") + b"\n")
+        elif line.startswith(b"CMD:SUBSCRIBE"):
             try:
-                reverse = int(config_reverse)
+                request = json.loads(line[13:] or b"{}")
             except ValueError:
-                reverse = (
-                    1 if str(config_reverse).lower() in ("true", "yes", "on") else 0
-                )
-
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
+                request = {}
+            self._subscribe_client(client, request)
 
-        config_content = f"""[general]
-bars = {bars}
-sleep_timer = 1
+    def _release_implicit(self, client):
+        """Drop the legacy stream of a command client that was slow to send"""
+        if not client.implicit or client.pipeline is None:
+            return
+        self._leave_pipeline(client)
+        client.proto = None
+        client.implicit = False
+        client.pending = None
+
+    def stats(self):
+        """Manager statistics returned by CMD:STATS"""
+        pipelines = [pipeline.stats() for pipeline in self.pipelines.values()]
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.monotonic() - self.started_at, 1),
+            "frames_in": sum(p["frames_in"] for p in pipelines),
+            "frames_out": sum(p["frames_out"] for p in pipelines),
+            "frames_suppressed": sum(p["frames_suppressed"] for p in pipelines),
+            "cava_restarts": sum(p["cava_restarts"] for p in pipelines),
+            "pipelines": pipelines,
+        }
+
+    def _watch_cava(self, process, pipeline):
+        """Register a cava stdout pipe with the event loop"""
+        if self.selector and process and process.stdout:
+            os.set_blocking(process.stdout.fileno(), False)
+            self.selector.register(process.stdout, selectors.EVENT_READ, pipeline)
+
+    def _unwatch_cava(self, process):
+        """Remove a cava stdout pipe from the event loop"""
+        if self.selector and process and process.stdout:
+            try:
+                self.selector.unregister(process.stdout)
+            except (KeyError, ValueError):
+                pass
 
-[input]
-method = pulse
-source = auto
+    def _retire_cava(self, process, timeout=2):
+        """Terminate a cava process without waiting, it is reaped later"""
+        self._unwatch_cava(process)
+        if process.poll() is None:
+            process.terminate()
+            # A stopped cava only acts on SIGTERM once continued
+            process.send_signal(signal.SIGCONT)
+        self.retired_processes.append((process, time.monotonic() + timeout))
+
+    def _reap_cava(self):
+        """Reap retired cava processes, killing the ones that hang"""
+        now = time.monotonic()
+        for entry in self.retired_processes[:]:
+            process, deadline = entry
+            if process.poll() is None:
+                if now < deadline:
+                    continue
+                process.kill()
+                process.wait()
+            if process.stdout:
+                process.stdout.close()
+            self.retired_processes.remove(entry)
+
+    def _run_loop(self):
+        """Multiplex cava output, new connections and clients until shutdown"""
+        while not self.should_shutdown:
+            timeout = 0.2
+            now = time.monotonic()
+            for pipeline in self.pipelines.values():
+                held = pipeline.held_timeout(now)
+                if held is not None and held < timeout:
+                    timeout = held
+            for key, events in self.selector.select(timeout=timeout):
+                if key.fileobj is self.server_socket:
+                    self._accept_clients()
+                elif isinstance(key.data, CavaPipeline):
+                    key.data.read_cava(key.fileobj)
+                else:
+                    client = key.data
+                    if events & selectors.EVENT_READ and not client.closed:
+                        self._read_client(client)
+                    if events & selectors.EVENT_WRITE and not client.closed:
+                        self._flush_client(client)
+
+            now = time.monotonic()
+            for client in self.clients[:]:
+                if (
+                    client.proto is None
+                    and client.silent
+                    and now >= client.handshake_deadline
+                ):
+                    # Clients that never send anything get ascii frames of the
+                    # pipeline that follows the config
+                    self._subscribe_client(client, {})
+                    client.implicit = client.proto is not None
+
+            for pipeline in list(self.pipelines.values()):
+                pipeline.check_timers()
+
+            if self.retired_processes:
+                self._reap_cava()
+
+            if (
+                not self.should_shutdown
+                and not self.clients
+                and time.time() - self.last_client_time > 1
+            ):
+                print("No clients connected for 5 seconds, shutting down...")
+                self.should_shutdown = True
 
-[output]
-method = raw
-raw_target = /dev/stdout
-data_format = ascii
-ascii_max_range = {range_val}
-channels = {channels}
-reverse = {reverse}
-"""
+    def _reload_pipelines(self):
+        """Apply the latest Hyde config to every running pipeline"""
+        print("Reloading cava settings...")
+        # Always use latest config values
+        hyde_config = HydeConfig()
+        bars = hyde_config.get_int("CAVA_BARS", 16)
+        range_val = hyde_config.get_int("CAVA_RANGE", 15)
+        channels = hyde_config.get_value("CAVA_CHANNELS", "stereo")
+        reverse = int(hyde_config.get_bool("CAVA_REVERSE"))
+        if channels not in ("mono", "stereo"):
+            channels = "stereo"
+        self.default_format = (bars, range_val, channels)
+        self.default_reverse = reverse
 
-        with open(self.config_file, "w") as f:
-            f.write(config_content)
+        for key, pipeline in list(self.pipelines.items()):
+            # Pipelines asked for by clients keep their capture settings
+            frame_format = self.default_format if key is None else key
+            pipeline.reload(hyde_config, frame_format, reverse)
 
-    def start(self, bars=16, range_val=15, channels="stereo", reverse=0):
-        """Start the cava server"""
-        self.shutdown_event = threading.Event()
-        threads = []
+    def start(
+        self, bars=16, range_val=15, channels="stereo", reverse=0, listen_socket=None
+    ):
+        """Start the cava server, on listen_socket when one is handed over"""
         try:
             self.temp_dir.mkdir(parents=True, exist_ok=True)
-            self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            try:
-                self.server_socket.bind(self.socket_file)
-                self.server_socket.listen(10)
-            except OSError as e:
-                error_msg = {
-                    98: "Error: Cava manager is already running",
-                    2: None,  # Handle directory creation separately
-                }.get(e.errno, f"Error: Could not bind to socket: {e}")
-
-                if e.errno == 2:
-                    os.makedirs(os.path.dirname(self.socket_file), exist_ok=True)
-                    try:
-                        self.server_socket.bind(self.socket_file)
-                        self.server_socket.listen(10)
-                    except OSError as e2:
-                        error_msg = (
-                            "Error: Cava manager is already running"
-                            if e2.errno == 98
-                            else f"Error: Could not bind to socket: {e2}"
-                        )
+            if listen_socket is None:
+                listen_socket = self._inherited_socket()
+                # systemd keeps the socket file once we exit
+                self.owns_socket_file = listen_socket is None
+            if listen_socket is not None:
+                self.server_socket = listen_socket
+            else:
+                self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    self.server_socket.bind(self.socket_file)
+                    self.server_socket.listen(10)
+                except OSError as e:
+                    error_msg = {
+                        98: "Error: Cava manager is already running",
+                        2: None,  # Handle directory creation separately
+                    }.get(e.errno, f"Error: Could not bind to socket: {e}")
+
+                    if e.errno == 2:
+                        os.makedirs(os.path.dirname(self.socket_file), exist_ok=True)
+                        try:
+                            self.server_socket.bind(self.socket_file)
+                            self.server_socket.listen(10)
+                        except OSError as e2:
+                            error_msg = (
+                                "Error: Cava manager is already running"
+                                if e2.errno == 98
+                                else f"Error: Could not bind to socket: {e2}"
+                            )
+                            print(error_msg)
+                            self.server_socket.close()
+                            self.server_socket = None
+                            sys.exit(1)
+                    else:
                         print(error_msg)
                         self.server_socket.close()
                         self.server_socket = None
                         sys.exit(1)
-                else:
-                    print(error_msg)
-                    self.server_socket.close()
-                    self.server_socket = None
-                    sys.exit(1)
 
             print(f"Cava manager started. Socket: {self.socket_file}")
 
@@ -453,114 +1946,27 @@ reverse = {reverse}
                 self.successfully_started = True
 
             self._write_pid_file()
-            self._create_cava_config(bars, range_val, channels, reverse)
 
-            print(f"Starting cava with config: {self.config_file}")
-            try:
-                self.cava_process = subprocess.Popen(
-                    ["cava", "-p", str(self.config_file)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                )
-            except FileNotFoundError:
+            # cava itself starts with the first pipeline a client asks for
+            if not shutil.which("cava"):
                 print("Error: cava not found. Please install cava.")
                 sys.exit(1)
-
-            def read_cava_output():
-                import select
-
-                while not self.shutdown_event.is_set():
-                    if self.cava_process.stdout:
-                        rlist, _, _ = select.select(
-                            [self.cava_process.stdout], [], [], 0.2
-                        )
-                        if rlist:
-                            line = self.cava_process.stdout.readline()
-                            if not line or self.shutdown_event.is_set():
-                                break
-                            line_stripped = line.strip()
-                            if line_stripped:
-                                values = [
-                                    x for x in line_stripped.split(";") if x.isdigit()
-                                ]
-                                if values and all(int(v) == 0 for v in values):
-                                    self.consecutive_zero_count += 1
-                                    if (
-                                        self.consecutive_zero_count
-                                        <= self.zero_threshold
-                                    ):
-                                        self._broadcast_data(line.encode("utf-8"))
-                                else:
-                                    self.consecutive_zero_count = 0
-                                    if values:
-                                        self._broadcast_data(line.encode("utf-8"))
-                        else:
-                            continue
-                    else:
-                        break
-
-            def handle_client_connections():
-                while not self.shutdown_event.is_set():
-                    try:
-                        self.server_socket.settimeout(0.2)
-                        conn, addr = self.server_socket.accept()
-                        print("New client connected")
-                        threading.Thread(
-                            target=self._client_command_listener,
-                            args=(conn,),
-                            daemon=True,
-                        ).start()
-                        with self.clients_lock:
-                            self.clients.append(conn)
-                            self.last_client_time = time.time()
-                    except socket.timeout:
-                        continue
-                    except OSError:
-                        break
-
-            def check_auto_shutdown():
-                while not self.shutdown_event.is_set():
-                    time.sleep(1)
-                    with self.clients_lock:
-                        if not self.clients and time.time() - self.last_client_time > 1:
-                            print(
-                                "No clients connected for 5 seconds, shutting down..."
-                            )
-                            self.shutdown_event.set()
-                            break
-
-            threads.append(
-                threading.Thread(target=handle_client_connections, daemon=True)
-            )
-            threads.append(threading.Thread(target=check_auto_shutdown, daemon=True))
-            threads.append(threading.Thread(target=read_cava_output, daemon=True))
-            for t in threads:
-                t.start()
-
-            def shutdown_handler(signum=None, frame=None):
-                self.shutdown_event.set()
-                for t in threads:
-                    t.join(timeout=2)
-                if self.cava_process and self.cava_process.poll() is None:
-                    try:
-                        self.cava_process.terminate()
-                        self.cava_process.wait(timeout=2)
-                    except Exception:
-                        try:
-                            self.cava_process.kill()
-                        except Exception:
-                            pass
-                self.cleanup()
-                os._exit(0)
-
-            signal.signal(signal.SIGTERM, shutdown_handler)
-            signal.signal(signal.SIGINT, shutdown_handler)
+            config_channels = HydeConfig().get_value("CAVA_CHANNELS")
+            if config_channels in ("mono", "stereo"):
+                channels = config_channels
+            self.default_format = (bars, range_val, channels)
+            self.default_reverse = reverse
+
+            self.server_socket.setblocking(False)
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.server_socket, selectors.EVENT_READ)
+
+            signal.signal(signal.SIGTERM, self._signal_handler)
+            signal.signal(signal.SIGINT, self._signal_handler)
             try:
-                while not self.shutdown_event.is_set():
-                    time.sleep(0.2)
+                self._run_loop()
             except KeyboardInterrupt:
-                shutdown_handler()
+                pass
 
         except Exception as e:
             print(f"Error starting manager: {e}")
@@ -573,44 +1979,61 @@ reverse = {reverse}
         """Check if the server is running"""
         return self._quick_check_running()
 
-    def start_in_background(self, bars=16, range_val=15):
-        """Start the manager in background and return immediately"""
-        if self.is_running():
-            return True
-
-        script_path = os.path.abspath(__file__)
-        try:
-            process = subprocess.Popen(
-                [
-                    sys.executable,
-                    script_path,
-                    "manager",
-                    "--bars",
-                    str(bars),
-                    "--range",
-                    str(range_val),
-                ],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True,
-            )
-
-            max_wait = 5
-            start_time = time.time()
-            while time.time() - start_time < max_wait:
-                if self.is_running():
-                    return True
-                time.sleep(0.1)
-
-            if process.poll() is None:
-                time.sleep(0.5)
-                if self.is_running():
-                    return True
 
-            return False
-        except Exception as e:
-            print(f"Failed to start manager in background: {e}", file=sys.stderr)
-            return False
+class CavaLineReader:
+    """Read newline terminated frames from a socket into a reused bytearray
+
+    When frames queued up while the client was busy only the newest complete
+    one is returned, stale ones are dropped so latency stays bounded.
+    """
+
+    def __init__(self, sock, initial=b"", size=4096):
+        self.sock = sock
+        self.buf = bytearray(max(size, 2 * len(initial)))
+        self.buf[: len(initial)] = initial
+        self.filled = len(initial)
+
+    def _fill(self, flags=0):
+        """recv_into the free space, None when nothing is waiting"""
+        buf = self.buf
+        if self.filled == len(buf):
+            # Only the newest complete line and what follows it are kept
+            end = buf.rfind(b"\n", 0, self.filled)
+            start = buf.rfind(b"\n", 0, end) + 1 if end >= 0 else 0
+            if start:
+                buf[: self.filled - start] = buf[start : self.filled]
+                self.filled -= start
+            else:
+                buf.extend(bytes(len(buf)))
+        with memoryview(buf) as view:
+            try:
+                return self.sock.recv_into(view[self.filled :], 0, flags)
+            except BlockingIOError:
+                return None
+
+    def read_latest(self):
+        """Return the newest complete line including its newline, None at EOF"""
+        buf = self.buf
+        while True:
+            end = buf.rfind(b"\n", 0, self.filled)
+            if end < 0:
+                received = self._fill()
+                if not received:
+                    return None
+                self.filled += received
+                continue
+            # Drain frames that are already queued so the newest one wins
+            received = self._fill(socket.MSG_DONTWAIT)
+            if received:
+                self.filled += received
+                continue
+            start = buf.rfind(b"\n", 0, end) + 1
+            line = bytes(buf[start : end + 1])
+            # Keep the partial frame that follows
+            rest = self.filled - end - 1
+            buf[:rest] = buf[end + 1 : self.filled]
+            self.filled = rest
+            return line
 
 
 class CavaClient:
@@ -621,93 +2044,179 @@ class CavaClient:
             "XDG_RUNTIME_DIR", os.path.join("/run/user", str(os.getuid()))
         )
         self.socket_file = os.path.join(self.runtime_dir, "hyde", "cava.sock")
+        self.lock_file = os.path.join(self.runtime_dir, "hyde", "cava.lock")
         self.parser = CavaDataParser()
+        self.max_fps = 0
+        self.socket = None
+
+    def stop(self):
+        """Make start() return, safe to call from another thread"""
+        client_socket = self.socket
+        if client_socket is not None:
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _connect(self, bars=None, range_val=None):
+        """Connect to the manager, starting one on a ready socket if needed"""
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client_socket.connect(self.socket_file)
+            return client_socket
+        except (ConnectionRefusedError, FileNotFoundError):
+            client_socket.close()
+
+        os.makedirs(os.path.dirname(self.socket_file), exist_ok=True)
+        with open(self.lock_file, "w") as lock:
+            # One client binds, the others wait here and then connect to it
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                client_socket.connect(self.socket_file)
+                return client_socket
+            except (ConnectionRefusedError, FileNotFoundError):
+                client_socket.close()
 
-    def _auto_start_manager_if_needed(self, bars=16, range_val=15):
-        """Automatically start manager if not running"""
-        server = CavaServer()
-        if not server.is_running():
             print("Manager not running, starting automatically...", file=sys.stderr)
-            if server.start_in_background(bars, range_val):
-                print("Manager started successfully", file=sys.stderr)
-                return True
-            else:
-                print("Failed to start manager automatically", file=sys.stderr)
-                return False
-        return True
+            try:
+                os.remove(self.socket_file)
+            except FileNotFoundError:
+                pass
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            listener.bind(self.socket_file)
+            listener.listen(10)
+
+        self._start_manager(listener, bars, range_val)
+        listener.close()
+        # The socket already listens, so the connection waits in its backlog
+        # until the manager accepts it
+        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client_socket.connect(self.socket_file)
+        return client_socket
+
+    @staticmethod
+    def _start_manager(listener, bars, range_val):
+        """Run a manager on the listening socket in a detached process"""
+        hyde_config = HydeConfig()
+        # The shared pipeline captures with the configured settings
+        if bars is None:
+            bars = hyde_config.get_int("CAVA_BARS", 16)
+        if range_val is None:
+            range_val = hyde_config.get_int("CAVA_RANGE", 15)
+        if threading.active_count() > 1:
+            # Forking a threaded host (the bar daemon) is not safe. A fresh
+            # interpreter does the detaching fork instead and exits right
+            # away, so it is reaped here and the manager is left to init
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-S",
+                    "-c",
+                    DETACH_SCRIPT,
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "manager",
+                    "--bars",
+                    str(bars),
+                    "--range",
+                    str(range_val),
+                    "--listen-fd",
+                    str(listener.fileno()),
+                ],
+                pass_fds=(listener.fileno(),),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            return
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            os.waitpid(pid, 0)
+            return
+        try:
+            os.setsid()
+            if os.fork():
+                os._exit(0)
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+            os.close(devnull)
+            CavaServer().start(bars, range_val, listen_socket=listener)
+        finally:
+            os._exit(0)
 
     def start(
         self,
         bar_chars="▁▂▃▄▅▆▇█",
         width=None,
         standby_mode=0,
-        timeout=10,
-        bars=16,
-        range_val=15,
+        bars=None,
+        range_val=None,
         json_output=False,
+        protocol="render",
+        command=None,
+        command_args=None,
+        max_fps=0,
+        output=None,
     ):
-        """Start the cava client"""
-        if not self._auto_start_manager_if_needed(bars, range_val):
-            print("Error: Could not start cava manager", file=sys.stderr)
-            sys.exit(1)
-
-        start_time = time.time()
-        while not os.path.exists(self.socket_file):
-            if time.time() - start_time > timeout:
-                print(
-                    "Error: Cava manager not accessible after timeout", file=sys.stderr
-                )
-                sys.exit(1)
-            time.sleep(0.1)
-
+        """Start the cava client, output receives each frame's bytes (stdout)"""
+        self.max_fps = max_fps
+        write = output or self._write_frame
+        client_socket = None
         try:
-            client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            client_socket.connect(self.socket_file)
-
-            standby_output = self.parser._handle_standby_mode(
-                standby_mode, bar_chars, width
-            )
-            if not (
-                (standby_mode == 0 and standby_output == "")
-                or (standby_mode == "" and standby_output == "")
-            ):
-                if json_output:
-                    output = {
-                        "text": standby_output,
-                        "tooltip": "Cava audio visualizer - standby mode",
+            client_socket = self.socket = self._connect(bars, range_val)
+
+            formatter = CavaFrameFormatter(bar_chars, width, standby_mode, json_output)
+            # Without bars/range the client joins the shared pipeline and
+            # frames are resampled to its width, pinning them runs a
+            # separate cava for that combination
+            request = {"proto": protocol}
+            if bars is not None:
+                request["bars"] = bars
+            if range_val is not None:
+                request["range"] = range_val
+            if max_fps:
+                request["fps"] = max_fps
+            if protocol == "render":
+                request.update(
+                    {
+                        "bar_chars": list(bar_chars),
+                        "width": width,
+                        "standby": standby_mode,
+                        "json": bool(json_output),
                     }
-                    print(json.dumps(output), flush=True)
-                else:
-                    print(standby_output, flush=True)
+                )
+                if command:
+                    # The manager re-derives the spec from config on reload
+                    request["command"] = command
+                    request["args"] = command_args or {}
+            client_socket.sendall(
+                b"CMD:SUBSCRIBE " + json.dumps(request).encode("utf-8") + b"\n"
+            )
 
-            buffer = ""
-            while True:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
+            standby_line = formatter.standby_line()
+            if standby_line is not None:
+                write((standby_line + "\n").encode("utf-8"))
+
+            if protocol == "render":
+                rendered, initial = self._read_render_ack(client_socket)
+                if rendered:
+                    self._copy_rendered(client_socket, initial, write)
+                    return
+                # Manager predates server side rendering, render locally
+                frames = self._read_ascii_frames(client_socket, initial)
+            elif protocol == "shm":
+                frames = self._read_shm_frames(client_socket)
+            else:
+                frames = self._read_frames(client_socket, protocol)
 
-                decoded_data = data.decode("utf-8")
-                if decoded_data.strip():
-                    buffer += decoded_data
-
-                    while "\n" in buffer:
-                        line, buffer = buffer.split("\n", 1)
-                        if line.strip():
-                            formatted = self.parser.format_data(
-                                line, bar_chars, width, standby_mode
-                            )
-                            should_suppress = (
-                                standby_mode == 0 and formatted == ""
-                            ) or (standby_mode == "" and formatted == "")
-                            if not should_suppress:
-                                if json_output:
-                                    output = {
-                                        "text": formatted,
-                                        "tooltip": "Cava audio visualizer - active",
-                                    }
-                                    print(json.dumps(output), flush=True)
-                                else:
-                                    print(formatted, flush=True)
+            for values in frames:
+                line = formatter.format(values)
+                if line is not None:
+                    write((line + "\n").encode("utf-8"))
 
         except (ConnectionRefusedError, FileNotFoundError):
             print("Error: Cannot connect to cava manager", file=sys.stderr)
@@ -720,6 +2229,157 @@ class CavaClient:
             except Exception:
                 pass
 
+    @staticmethod
+    def _read_render_ack(client_socket):
+        """Wait for the render ack, returns (acked, bytes read past it)"""
+        data = b""
+        while len(data) < len(RENDER_ACK) and RENDER_ACK.startswith(data):
+            chunk = client_socket.recv(1024)
+            if not chunk:
+                break
+            data += chunk
+        if data.startswith(RENDER_ACK):
+            return True, data[len(RENDER_ACK) :]
+        return False, data
+
+    @staticmethod
+    def _write_frame(data):
+        """Write one output frame to stdout with a single write call"""
+        view = memoryview(data)
+        fd = sys.stdout.fileno()
+        while view:
+            view = view[os.write(fd, view) :]
+
+    @staticmethod
+    def _copy_rendered(client_socket, initial, write):
+        """Copy the newest server rendered line straight to the output"""
+        reader = CavaLineReader(client_socket, initial)
+        while True:
+            line = reader.read_latest()
+            if line is None:
+                break
+            write(line)
+
+    def _read_shm_frames(self, client_socket):
+        """Yield bar values read from the manager's shared memory ring
+
+        The socket only carries the ack and tells when the manager is gone,
+        frames are copied straight out of shared memory.
+        """
+        data = b""
+        while b"\n" not in data and SHM_ACK.startswith(data[: len(SHM_ACK)]):
+            chunk = client_socket.recv(1024)
+            if not chunk:
+                return
+            data += chunk
+        if not data.startswith(SHM_ACK):
+            # No ring on the manager side, it streams binary or ascii frames
+            yield from self._read_frames(client_socket, "binary", data)
+            return
+        line, data = data.split(b"\n", 1)
+        try:
+            ring = CavaFrameRing.attach(line[len(SHM_ACK) :].decode("utf-8"))
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Warning: Cannot use shared memory ring: {e}", file=sys.stderr)
+            client_socket.sendall(b'CMD:SUBSCRIBE {"proto": "binary"}\n')
+            yield from self._read_frames(client_socket, "binary")
+            return
+
+        client_socket.setblocking(False)
+        seq = 0
+        interval = 1.0 / self.max_fps if self.max_fps else 0
+        next_at = 0.0
+        try:
+            while True:
+                if ring.sequence() != seq:
+                    if interval:
+                        # The ring always holds the newest frame to read later
+                        now = time.monotonic()
+                        if now < next_at:
+                            time.sleep(next_at - now)
+                        next_at = max(next_at, now - interval) + interval
+                    frame = ring.read()
+                    if frame is not None:
+                        seq, values = frame
+                        yield values
+                        continue
+                ring.wait(seq, 1.0)
+                if ring.sequence() == seq:
+                    # Nothing new, check whether the manager went away
+                    try:
+                        if not client_socket.recv(1024):
+                            return
+                    except BlockingIOError:
+                        pass
+        finally:
+            ring.close()
+
+    def _read_frames(self, client_socket, protocol, initial=b""):
+        """Yield bar values for each frame, falling back to ascii for old managers"""
+        if protocol != "binary":
+            return self._read_ascii_frames(client_socket, initial)
+
+        head = bytearray(max(FRAME_HEADER.size, len(initial)))
+        head[: len(initial)] = initial
+        view = memoryview(head)
+        filled = len(initial)
+        while filled < len(FRAME_MAGIC):
+            received = client_socket.recv_into(view[filled:])
+            if not received:
+                return iter(())
+            filled += received
+        view.release()
+        if head[: len(FRAME_MAGIC)] != FRAME_MAGIC:
+            # Manager predates the binary protocol and sends ascii lines
+            return self._read_ascii_frames(client_socket, bytes(head[:filled]))
+        return self._read_binary_frames(client_socket, head, filled)
+
+    def _read_ascii_frames(self, client_socket, initial):
+        """Yield bar values of the newest newline separated ascii frame"""
+        reader = CavaLineReader(client_socket, initial)
+        while True:
+            line = reader.read_latest()
+            if line is None:
+                break
+            if line.strip():
+                yield self.parser.parse_values(line.decode("utf-8"))
+
+    @staticmethod
+    def _read_binary_frames(client_socket, buf, filled):
+        """Yield bar values of binary frames read with recv_into into a reused buffer"""
+        header_size = FRAME_HEADER.size
+        expected = header_size
+        view = memoryview(buf)
+        while True:
+            while filled < expected:
+                received = client_socket.recv_into(view[filled:expected])
+                if not received:
+                    return
+                filled += received
+            magic, _, sample_width, bars, _, _ = FRAME_HEADER.unpack_from(buf)
+            if magic != FRAME_MAGIC:
+                print("Error: Lost sync with cava manager stream", file=sys.stderr)
+                return
+            frame_size = header_size + bars * sample_width
+            if filled < frame_size:
+                if len(buf) < frame_size:
+                    # First frame or the manager changed its bar count
+                    grown = bytearray(frame_size)
+                    grown[:filled] = buf[:filled]
+                    buf, view = grown, memoryview(grown)
+                expected = frame_size
+                continue
+
+            payload = view[header_size:frame_size]
+            yield payload if sample_width == 1 else payload.cast("H")
+
+            # Keep bytes that already belong to the next frame
+            extra = filled - frame_size
+            if extra:
+                buf[:extra] = buf[frame_size:filled]
+            filled = extra
+            expected = frame_size
+
     @staticmethod
     def parse_command_config(hyde_config, command, args):
         """Parse configuration for a specific command type"""
@@ -730,8 +2390,8 @@ class CavaClient:
             bar_chars = args.bar_array
         else:
             # Prefer BAR_ARRAY from config if present and is a list
-            bar_array = hyde_config.get_value(f"{prefix}_BAR_ARRAY")
-            if bar_array and isinstance(bar_array, list):
+            bar_array = hyde_config.get_list(f"{prefix}_BAR_ARRAY")
+            if bar_array:
                 bar_chars = bar_array
             else:
                 bar_chars = args.bar or hyde_config.get_value(
@@ -743,7 +2403,7 @@ class CavaClient:
         width = (
             args.width
             if args.width is not None
-            else int(hyde_config.get_value(f"{prefix}_WIDTH", "0") or 0)
+            else hyde_config.get_int(f"{prefix}_WIDTH", 0)
         )
         if not width:
             width = len(bar_chars) if bar_chars else 8
@@ -761,6 +2421,25 @@ class CavaClient:
 
         return bar_chars, width, standby_mode
 
+    @staticmethod
+    def parse_command_capture(hyde_config, command, args):
+        """Capture bars and range a command type pins, None for the shared ones"""
+        prefix = f"CAVA_{command.upper()}"
+        bars = getattr(args, "bars", None)
+        if bars is None:
+            bars = hyde_config.get_int(f"{prefix}_BARS", None)
+        range_val = getattr(args, "range", None)
+        if range_val is None:
+            range_val = hyde_config.get_int(f"{prefix}_RANGE", None)
+        return bars, range_val
+
+    @staticmethod
+    def parse_command_fps(hyde_config, command, args):
+        """Frame rate cap for a command type, 0 for every frame"""
+        if getattr(args, "fps", None) is not None:
+            return args.fps
+        return hyde_config.get_float(f"CAVA_{command.upper()}_FPS", 0)
+
 
 class CavaReloadClient:
     """Minimal client to send reload command to the server"""
@@ -786,6 +2465,151 @@ class CavaReloadClient:
             sys.exit(1)
 
 
+class CavaStatsClient:
+    """Minimal client to query manager statistics"""
+
+    def __init__(self):
+        self.runtime_dir = os.getenv(
+            "XDG_RUNTIME_DIR", os.path.join("/run/user", str(os.getuid()))
+        )
+        self.socket_file = os.path.join(self.runtime_dir, "hyde", "cava.sock")
+
+    def stats(self):
+        if not os.path.exists(self.socket_file):
+            print("Cava manager is not running.")
+            sys.exit(1)
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(2)
+            s.connect(self.socket_file)
+            s.sendall(b"CMD:STATS\n")
+            data = b""
+            while b"\n" not in data:
+                chunk = s.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            s.close()
+            print(json.dumps(json.loads(data.split(b"\n", 1)[0]), indent=2))
+        except Exception as e:
+            print(f"Failed to query stats: {e}")
+            sys.exit(1)
+
+
+class CavaBenchmark:
+    """Replay cava frames through the parser and the broadcast path"""
+
+    # Subscriptions of the simulated clients, a typical desktop setup
+    CLIENTS = (
+        {"proto": "render", "width": 8, "json": True},
+        {"proto": "render", "width": 16},
+        {"proto": "binary"},
+        {"proto": "ascii"},
+    )
+
+    def __init__(self, frames_file=None, rate=60, count=1000, bars=16, range_val=15):
+        self.frames_file = frames_file
+        self.rate = rate
+        self.count = count
+        self.bars = bars
+        self.range_val = range_val
+
+    def _load_lines(self):
+        """Recorded ascii frames, or random ones when no file is given"""
+        if self.frames_file:
+            with open(self.frames_file, "r") as f:
+                lines = [line for line in f if ";" in line]
+            return lines[: self.count] if self.count else lines
+        import random
+
+        rng = random.Random(0)
+        return [
+            "".join(f"{rng.randint(0, self.range_val)};" for _ in range(self.bars))
+            for _ in range(self.count or 1000)
+        ]
+
+    def run(self):
+        lines = self._load_lines()
+        if not lines:
+            print("Error: No frames to replay")
+            sys.exit(1)
+        parse_values = CavaDataParser.parse_values
+        frames = [parse_values(line) for line in lines]
+        range_val = max(self.range_val, max(max(values) for values in frames))
+
+        server = CavaServer()
+        server.selector = selectors.DefaultSelector()
+        pipeline = CavaPipeline(server, (len(frames[0]), range_val, "mono"))
+        pipeline._set_frame_format(*pipeline.frame_format)
+        peers = []
+        for request in self.CLIENTS:
+            ours, theirs = socket.socketpair()
+            ours.setblocking(False)
+            theirs.setblocking(False)
+            client = CavaSubscriber(ours)
+            server.clients.append(client)
+            server.selector.register(ours, selectors.EVENT_READ, client)
+            client.proto = pipeline.add_client(client, request["proto"], request)
+            peers.append(theirs)
+
+        perf_counter = time.perf_counter
+        interval = 1 / self.rate if self.rate > 0 else 0
+        parse_times, broadcast_times = [], []
+        next_tick = perf_counter()
+        for line in lines:
+            start = perf_counter()
+            values = parse_values(line)
+            if pipeline.sample_width == 1:
+                values = bytes(values)
+            else:
+                values = array("H", values)
+            parsed = perf_counter()
+            pipeline._broadcast_data(values)
+            done = perf_counter()
+            parse_times.append(parsed - start)
+            broadcast_times.append(done - parsed)
+
+            # Play the part of the clients, outside of the measured path
+            for peer in peers:
+                try:
+                    while peer.recv(65536):
+                        pass
+                except BlockingIOError:
+                    pass
+            for client in server.clients:
+                if client.writing:
+                    server._flush_client(client)
+            if interval:
+                next_tick += interval
+                delay = next_tick - perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        for client in server.clients:
+            client.sock.close()
+        for peer in peers:
+            peer.close()
+        server.selector.close()
+
+        total_times = [a + b for a, b in zip(parse_times, broadcast_times)]
+        rate = f"{self.rate} fps" if interval else "full speed"
+        print(
+            f"Replayed {len(lines)} frames of {len(frames[0])} bars at {rate} "
+            f"to {len(self.CLIENTS)} clients"
+        )
+        for name, samples in (
+            ("parse", parse_times),
+            ("broadcast", broadcast_times),
+            ("total", total_times),
+        ):
+            summary = percentiles(samples)
+            print(
+                f"{name:<10} avg {summary['avg']:>8}us  p50 {summary['p50']:>8}us  "
+                f"p99 {summary['p99']:>8}us  max {summary['max']:>8}us"
+            )
+        print(f"Suppressed {pipeline.frames_suppressed} unchanged frames")
+
+
 def create_client_parser(subparsers, name, help_text):
     """Create a client parser with common arguments"""
     parser = subparsers.add_parser(name, help=help_text)
@@ -796,11 +2620,35 @@ def create_client_parser(subparsers, name, help_text):
         help="Bar characters as an array (e.g. --bar-array '<span color=red>#</span>' '<span color=green>#</span>')",
     )
     parser.add_argument("--width", type=int, help="Bar width")
+    parser.add_argument(
+        "--bars",
+        type=int,
+        default=None,
+        help="Capture this many bars in a separate cava (default: the shared CAVA_BARS capture resampled to the width)",
+    )
+    parser.add_argument(
+        "--range",
+        type=int,
+        default=None,
+        help="Capture with this ASCII range in a separate cava (default: CAVA_RANGE)",
+    )
     parser.add_argument(
         "--stb",
         default=None,
         help='Standby mode (0-3 or string): 0=clean (totally hides the module), 1=blank (makes module expand as spaces), 2=full (occupies the module with full bar), 3=low (makes the module display the lowest set bar), ""=displays nothing and compresses the module, string=displays the custom string',
     )
+    parser.add_argument(
+        "--protocol",
+        choices=["render", "binary", "ascii", "shm"],
+        default="render",
+        help="Wire protocol to request from the manager: render (manager renders the output), binary, ascii or shm (shared memory ring, rendered locally)",
+    )
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=None,
+        help="Maximum frames per second to receive (default: cava framerate)",
+    )
     if name == "waybar":
         parser.add_argument(
             "--json", action="store_true", help="Output JSON format for waybar tooltips"
@@ -814,8 +2662,12 @@ def main():
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
     manager_parser = subparsers.add_parser("manager", help="Start cava manager")
-    manager_parser.add_argument("--bars", type=int, default=16, help="Number of bars")
-    manager_parser.add_argument("--range", type=int, default=15, help="ASCII range")
+    manager_parser.add_argument(
+        "--bars", type=int, default=None, help="Number of bars (default: CAVA_BARS)"
+    )
+    manager_parser.add_argument(
+        "--range", type=int, default=None, help="ASCII range (default: CAVA_RANGE)"
+    )
     manager_parser.add_argument(
         "--channels",
         choices=["mono", "stereo"],
@@ -829,6 +2681,12 @@ def main():
         default=0,
         help="Reverse frequency order: 0=normal, 1=reverse",
     )
+    manager_parser.add_argument(
+        "--listen-fd",
+        type=int,
+        default=None,
+        help=argparse.SUPPRESS,
+    )
 
     create_client_parser(subparsers, "waybar", "Waybar client")
     create_client_parser(subparsers, "stdout", "Stdout client")
@@ -836,16 +2694,51 @@ def main():
 
     subparsers.add_parser("status", help="Check manager status")
     subparsers.add_parser("reload", help="Reload cava manager (restart cava process)")
+    subparsers.add_parser("stats", help="Show cava manager statistics as JSON")
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Measure the per frame cost of parsing and broadcasting"
+    )
+    bench_parser.add_argument(
+        "file",
+        nargs="?",
+        help="Recorded cava frames, one ascii frame per line as written by cava with data_format = ascii (random frames if omitted)",
+    )
+    bench_parser.add_argument(
+        "--rate", type=int, default=60, help="Replay rate in fps, 0 for full speed"
+    )
+    bench_parser.add_argument(
+        "--frames", type=int, default=1000, help="Number of frames to replay"
+    )
+    bench_parser.add_argument(
+        "--bars", type=int, default=16, help="Bars of the random frames"
+    )
+    bench_parser.add_argument(
+        "--range", type=int, default=15, help="Range of the random frames"
+    )
 
     args = parser.parse_args()
 
     if args.command == "manager":
+        # Same defaults as a manager started by a client or by the socket unit
+        hyde_config = HydeConfig()
+        if args.bars is None:
+            args.bars = hyde_config.get_int("CAVA_BARS", 16)
+        if args.range is None:
+            args.range = hyde_config.get_int("CAVA_RANGE", 15)
         server = CavaServer()
-        if server.is_running():
+        listen_socket = None
+        if args.listen_fd is not None:
+            # Listening socket bound by the client that started us
+            listen_socket = socket.socket(fileno=args.listen_fd)
+        # Under socket activation the inherited socket is the one to serve
+        elif not os.getenv("LISTEN_FDS") and server.is_running():
             print("Cava manager is already running")
             sys.exit(0)
 
-        server.start(args.bars, args.range, args.channels, args.reverse)
+        server.start(
+            args.bars, args.range, args.channels, args.reverse, listen_socket
+        )
 
     elif args.command in ["waybar", "stdout", "hyprlock"]:
         hyde_config = HydeConfig()
@@ -854,10 +2747,12 @@ def main():
             hyde_config, args.command, args
         )
 
-        bars = width
-        range_val = int(hyde_config.get_value("CAVA_RANGE", "15"))
+        bars, range_val = CavaClient.parse_command_capture(
+            hyde_config, args.command, args
+        )
 
         json_output = args.command == "waybar" and hasattr(args, "json") and args.json
+        max_fps = CavaClient.parse_command_fps(hyde_config, args.command, args)
 
         client = CavaClient()
         client.start(
@@ -867,6 +2762,16 @@ def main():
             bars=bars,
             range_val=range_val,
             json_output=json_output,
+            protocol=args.protocol,
+            command=args.command,
+            command_args={
+                "bar": args.bar,
+                "bar_array": args.bar_array,
+                "width": args.width,
+                "stb": args.stb,
+                "fps": args.fps,
+            },
+            max_fps=max_fps,
         )
 
     elif args.command == "status":
@@ -881,6 +2786,12 @@ def main():
     elif args.command == "reload":
         CavaReloadClient().reload()
 
+    elif args.command == "stats":
+        CavaStatsClient().stats()
+
+    elif args.command == "bench":
+        CavaBenchmark(args.file, args.rate, args.frames, args.bars, args.range).run()
+
     else:
         parser.print_help()
 
@@ -25,6 +25,9 @@ logger = logger.get_logger()
 #
 players_data = {}
 current_player = None
+# Receives every output dict instead of stdout when set, the bar daemon
+# uses it to publish the module on its socket
+output_handler = None
 
 
 def load_env_file(filepath: str) -> None:
@@ -138,6 +141,17 @@ def format_artist_track(artist, track, playing, max_length):
     return output_text
 
 
+def emit(output: dict) -> None:
+    """
+    Write one waybar output line, or hand it to output_handler.
+    """
+    if output_handler is not None:
+        output_handler(output)
+        return
+    sys.stdout.write(json.dumps(output) + "\n")
+    sys.stdout.flush()
+
+
 def write_output(track, artist, playing, player, tooltip_text):
     logger.info("Writing output")
 
@@ -148,8 +162,7 @@ def write_output(track, artist, playing, player, tooltip_text):
         "tooltip": escape(tooltip_text),
     }
 
-    sys.stdout.write(json.dumps(output_data) + "\n")
-    sys.stdout.flush()
+    emit(output_data)
 
 
 def on_play(player, status, manager):
@@ -227,8 +240,7 @@ def on_player_vanished(manager, player, loop):
             "alt": "player-closed",
             "tooltip": "",
         }
-        sys.stdout.write(json.dumps(output) + "\n")
-        sys.stdout.flush()
+        emit(output)
 
 
 def init_player(manager, name):
@@ -309,13 +321,14 @@ def update_positions(manager):
             "alt": "player-closed",
             "tooltip": "",
         }
-        sys.stdout.write(json.dumps(output) + "\n")
-        sys.stdout.flush()
+        emit(output)
         return False  # Stop polling if no players
 
 
 def poll_if_players(manager):
     # Helper to only poll when there are players
+    if getattr(manager, "_stopped", False):
+        return False
     keep_polling = update_positions(manager)
     if keep_polling:
         return True  # Continue polling
@@ -347,6 +360,33 @@ def parse_arguments():
 
 
 def main():
+    arguments = parse_arguments()
+
+    # Initialize logging
+    logging.basicConfig(
+        stream=sys.stdout,
+        level=logging.DEBUG,
+        format="%(name)s %(levelname)s %(message)s",
+    )
+
+    logger.debug("Arguments received {}".format(vars(arguments)))
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGPIPE, signal_handler)
+
+    selected_players = arguments.players
+    if not selected_players and arguments.player:
+        selected_players = [arguments.player]
+    run(selected_players)
+
+
+def run(selected_players=None, keep_running=None):
+    """
+    Watch the players and emit output until the main loop quits.
+    Runs without touching signals or logging so the bar daemon can host it,
+    which passes keep_running to have the loop quit once it returns False.
+    """
     global \
         prefix_playing, \
         prefix_paused, \
@@ -398,42 +438,28 @@ def main():
     if players:
         players = players.split(",")
 
-    arguments = parse_arguments()
     player_found = False
 
-    # Initialize logging
-    logging.basicConfig(
-        stream=sys.stdout,
-        level=logging.DEBUG,
-        format="%(name)s %(levelname)s %(message)s",
-    )
-
-    logger.debug("Arguments received {}".format(vars(arguments)))
-
     manager = Playerctl.PlayerManager()
     choose = False
-    if not (arguments.players or arguments.player) and not players:
+    if not selected_players and not players:
         players = [name.name for name in manager.props.player_names]
     else:
         choose = True
-        if arguments.players:
-            players = arguments.players
-        elif arguments.player:
-            players = [arguments.player]
+        if selected_players:
+            players = selected_players
     loop = GLib.MainLoop()
 
-    manager.connect(
+    appeared_handler = manager.connect(
         "name-appeared",
         # if player didn't select a player(s)
         # then allow all mediaplayer.py to watch
         # all players that appear
         lambda *args: on_player_appeared(*args, players if choose else None),
     )
-    manager.connect("player-vanished", lambda *args: on_player_vanished(*args, loop))
-
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    signal.signal(signal.SIGPIPE, signal_handler)
+    vanished_handler = manager.connect(
+        "player-vanished", lambda *args: on_player_vanished(*args, loop)
+    )
 
     found = [None] * len(players)
     for player in manager.props.player_names:
@@ -467,14 +493,28 @@ def main():
             "alt": "player-closed",
             "tooltip": "",
         }
-        sys.stdout.write(json.dumps(output) + "\n")
-        sys.stdout.flush()
+        emit(output)
     # Set up a single 1-second timer to update song position only if there are players
     if manager.props.players:
         manager._polling = True
         GLib.timeout_add_seconds(1, poll_if_players, manager)
     else:
         manager._polling = False
+
+    if keep_running is not None:
+
+        def check_running():
+            if keep_running():
+                return True
+            # Stop this manager's position timer and callbacks, the default
+            # main context outlives the loop
+            manager._stopped = True
+            manager.disconnect(appeared_handler)
+            manager.disconnect(vanished_handler)
+            loop.quit()
+            return False
+
+        GLib.timeout_add_seconds(1, check_running)
     loop.run()
 
 
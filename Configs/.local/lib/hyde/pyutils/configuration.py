@@ -3,12 +3,16 @@ import re
 from typing import Optional
 from pathlib import Path
 from xdg_base_dirs import xdg_data_home, xdg_config_home
+import hyprconf
 
 
 #! Soo will be deprecated in favor of hyprquery
 def get_var(theme_var: str, file: Optional[str] = None) -> Optional[str]:
     """Get theme variable value from configuration files.
 
+    Variables resolve as Hyprland reads them: the last assignment wins, sourced
+    files included. The first gsettings ``exec`` line still wins for GS_MAP keys.
+
     Args:
         theme_var: The theme variable to look for
         file: Optional path to configuration file
@@ -32,30 +36,23 @@ def get_var(theme_var: str, file: Optional[str] = None) -> Optional[str]:
         "MONOSPACE_FONT_SIZE": "monospace-font-size",
     }
 
-    def extract_value_from_file(pattern: str, filepath: str) -> Optional[str]:
+    def load_config(filepath: str) -> Optional[hyprconf.HyprConfig]:
         try:
-            with open(filepath) as f:
-                for line in f:
-                    if re.match(pattern, line):
-                        value = line.split("=", 1)[1].strip()
-                        return re.sub(r"^[\s]*|[\s]*$", "", value)
-        except FileNotFoundError:
+            return hyprconf.load(filepath)
+        except OSError:
             return None
-        return None
 
-    if value := extract_value_from_file(rf"^[\s]*\${theme_var}\s*=", file):
+    theme_config = load_config(file)
+
+    if theme_config and (value := theme_config.get(f"${theme_var}")):
         if not value.startswith("$"):
             return value
 
-    if theme_var in GS_MAP:
-        try:
-            with open(file) as f:
-                pattern = rf"^[\s]*exec[\s]*=[\s]*gsettings[\s]*set[\s]*org.gnome.desktop.interface[\s]*{GS_MAP[theme_var]}[\s]*"
-                for line in f:
-                    if re.search(pattern, line):
-                        return line.split('"')[-2]
-        except FileNotFoundError:
-            pass
+    if theme_config and theme_var in GS_MAP:
+        pattern = rf"^gsettings[\s]*set[\s]*org.gnome.desktop.interface[\s]*{GS_MAP[theme_var]}[\s]*"
+        for command in theme_config.get_all("exec"):
+            if re.search(pattern, command):
+                return command.split('"')[-2]
 
     if theme_var == "CODE_THEME":
         return "Wallbash"
@@ -63,8 +60,8 @@ def get_var(theme_var: str, file: Optional[str] = None) -> Optional[str]:
         return ""
 
     default_configs = [
-        Path(xdg_data_home) / "hyde/hyde.conf",
-        Path(xdg_data_home) / "hyde/hyprland.conf",
+        Path(xdg_data_home()) / "hyde/hyde.conf",
+        Path(xdg_data_home()) / "hyde/hyprland.conf",
         Path("/usr/local/share/hyde/hyde.conf"),
         Path("/usr/local/share/hyde/hyprland.conf"),
         Path("/usr/share/hyde/hyde.conf"),
@@ -73,8 +70,9 @@ def get_var(theme_var: str, file: Optional[str] = None) -> Optional[str]:
 
     for config in default_configs:
         if config.exists():
-            if value := extract_value_from_file(
-                rf"^[\s]*\$default.{theme_var}\s*=", str(config)
+            default_config = load_config(str(config))
+            if default_config and (
+                value := default_config.get(f"$default.{theme_var}")
             ):
                 return value
 
@@ -0,0 +1,328 @@
+"""Native parser for the Hyprland config syntax, a Python stand-in for hyq.
+
+Handles the subset HyDE's theme and config files use:
+
+- ``$NAME = value`` variables, expanded in later values
+- ``source = path`` includes, relative to the including file, with ``~``
+  and glob patterns
+- sections like ``decoration { rounding = 10 }``, queried as
+  ``decoration:rounding``, and the inline form ``decoration:rounding = 10``
+- ``#`` comments, ``##`` for a literal ``#``
+
+A file and its includes are parsed once into an index, so any number of
+queries are dictionary lookups. The index is cached in memory and on disk
+under $XDG_CACHE_HOME/hyde/hyprconf, and reused while the hashes of all the
+files it was built from still match.
+
+    config = hyprconf.load("~/.config/hyde/themes/Nordic/hypr.theme")
+    config.get("$BAR_FONT")
+    config.get("decoration:rounding")
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+CACHE_VERSION = 3
+VARIABLE_PATTERN = re.compile(r"\$([A-Za-z0-9_]+)")
+
+_loaded: Dict[str, "HyprConfig"] = {}
+
+
+def _cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if not cache_home or not os.path.isabs(cache_home):
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "hyde", "hyprconf")
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def _file_hash(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(65536):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _strip_comment(line: str) -> str:
+    """Drop a trailing comment, keeping ``##`` as an escaped ``#``."""
+    if "#" not in line:
+        return line
+    out = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char == "#":
+            if line.startswith("##", i):
+                out.append("#")
+                i += 2
+                continue
+            break
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+class HyprConfig:
+    """Parsed Hyprland config: variables and values indexed by query key."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.variables: Dict[str, str] = {}
+        self.values: Dict[str, List[str]] = {}
+        # Every file read, path -> [mtime_ns, size, inode, sha256]
+        self.files: Dict[str, list] = {}
+        # source patterns and what they matched, to notice new includes
+        self.sources: Dict[str, List[str]] = {}
+
+    def get(self, query: str, default: Optional[str] = None) -> Optional[str]:
+        """Look up ``$VARIABLE`` or ``section:key``, the last assignment wins.
+
+        Args:
+            query: Variable name with ``$`` or a ``:`` separated key
+
+        Returns:
+            The expanded value or default if it is not set
+        """
+        if query.startswith("$"):
+            return self.variables.get(query[1:], default)
+        values = self.values.get(query)
+        return values[-1] if values else default
+
+    def get_all(self, query: str) -> List[str]:
+        """All values assigned to a repeatable key like ``exec`` or ``bind``."""
+        return list(self.values.get(query, []))
+
+    def __contains__(self, query: str) -> bool:
+        return self.get(query) is not None
+
+    def expand(self, value: str) -> str:
+        """Replace ``$NAME`` references with the variables defined so far."""
+        if "$" not in value:
+            return value
+        return VARIABLE_PATTERN.sub(
+            lambda match: self.variables.get(match.group(1), match.group(0)), value
+        )
+
+    def parse(self) -> "HyprConfig":
+        """Parse the file and everything it sources."""
+        self._parse_file(self.path, [])
+        return self
+
+    def _parse_file(self, path: str, stack: List[str]):
+        if path in stack:
+            # A file sourcing itself, directly or not, is read once
+            return
+        with open(path, "rb") as file:
+            data = file.read()
+        stamp = _stamp(path) or [0, 0, 0]
+        self.files[path] = stamp + [hashlib.sha256(data).hexdigest()]
+
+        base_dir = os.path.dirname(path)
+        sections: List[str] = []
+        for raw_line in data.decode("utf-8", "replace").splitlines():
+            line = _strip_comment(raw_line).strip()
+            if not line:
+                continue
+            if line.startswith("}"):
+                if sections:
+                    sections.pop()
+                continue
+            # Sections opened here, "decoration {" or "decoration { rounding = 10 }"
+            opened = 0
+            while "{" in line:
+                name, _, rest = line.partition("{")
+                if "=" in name:
+                    break
+                # device[name] { ... } style categories keep their key
+                sections.append(name.strip().replace("[", ":").rstrip("]"))
+                opened += 1
+                line = rest.strip()
+            closed = 0
+            while closed < opened and line.endswith("}"):
+                line = line[:-1].strip()
+                closed += 1
+
+            key, sep, value = line.partition("=")
+            if sep:
+                key = key.strip()
+                value = value.strip()
+                if value.endswith(";"):
+                    # "enabled = yes;" inside one-line sections, as hyq reads it
+                    value = value[:-1].rstrip()
+                value = self.expand(value)
+                if key.startswith("$") and not sections:
+                    self.variables[key[1:]] = value
+                elif key == "source" and not sections:
+                    self._source(value, base_dir, stack + [path])
+                else:
+                    full_key = ":".join(sections + [key])
+                    self.values.setdefault(full_key, []).append(value)
+            for _ in range(closed):
+                sections.pop()
+
+    def _source(self, pattern: str, base_dir: str, stack: List[str]):
+        pattern = os.path.expanduser(pattern)
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(base_dir, pattern)
+        matches = sorted(glob.glob(pattern))
+        self.sources[pattern] = matches
+        for match in matches:
+            if os.path.isfile(match):
+                self._parse_file(match, stack)
+
+    def is_current(self) -> bool:
+        """Check that no file or source glob changed since parsing."""
+        for path, (mtime_ns, size, inode, digest) in self.files.items():
+            stamp = _stamp(path)
+            if stamp is None:
+                return False
+            if stamp == [mtime_ns, size, inode]:
+                continue
+            # Touched or replaced, still fine if the content is the same
+            try:
+                if _file_hash(path) != digest:
+                    return False
+            except OSError:
+                return False
+            self.files[path] = stamp + [digest]
+        return all(
+            sorted(glob.glob(pattern)) == matches
+            for pattern, matches in self.sources.items()
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "version": CACHE_VERSION,
+            "path": self.path,
+            "variables": self.variables,
+            "values": self.values,
+            "files": self.files,
+            "sources": self.sources,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Optional["HyprConfig"]:
+        if data.get("version") != CACHE_VERSION:
+            return None
+        config = cls(data["path"])
+        config.variables = data["variables"]
+        config.values = data["values"]
+        config.files = data["files"]
+        config.sources = data["sources"]
+        return config
+
+
+def _cache_path(path: str) -> str:
+    name = hashlib.sha1(path.encode("utf-8")).hexdigest()
+    return os.path.join(_cache_dir(), f"{name}.json")
+
+
+def _read_cache(path: str) -> Optional[HyprConfig]:
+    try:
+        with open(_cache_path(path), "r") as file:
+            config = HyprConfig.from_dict(json.load(file))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if config is None or config.path != path:
+        return None
+    return config
+
+
+def _write_cache(config: HyprConfig):
+    cache_path = _cache_path(config.path)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_path, "w") as file:
+            json.dump(config.to_dict(), file)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def load(path: str, use_cache: bool = True) -> HyprConfig:
+    """Get the parsed config of a file, reusing cached parses while valid.
+
+    Args:
+        path: Hyprland config file, ``~`` is expanded
+        use_cache: Set False to always parse from scratch
+
+    Returns:
+        The parsed config
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    if use_cache:
+        config = _loaded.get(path)
+        if config is not None and config.is_current():
+            return config
+        config = _read_cache(path)
+        if config is not None and config.is_current():
+            _loaded[path] = config
+            return config
+
+    config = HyprConfig(path).parse()
+    _loaded[path] = config
+    if use_cache:
+        _write_cache(config)
+    return config
+
+
+def export_name(query: str) -> str:
+    """Variable name hyq uses when exporting a query, e.g. $FONT -> __FONT."""
+    return "_" + re.sub(r"[^A-Za-z0-9_]", "_", query)
+
+
+def main(args: List[str]) -> int:
+    import argparse
+    import shlex
+
+    parser = argparse.ArgumentParser(description="Query Hyprland config files")
+    parser.add_argument("file", help="Config file to parse")
+    parser.add_argument(
+        "-Q", "--query", action="append", default=[], help="Variable or key"
+    )
+    parser.add_argument(
+        "--export", choices=["env", "json"], help="Print name/value pairs"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always reparse")
+    args = parser.parse_args(args)
+
+    try:
+        config = load(args.file, use_cache=not args.no_cache)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.export == "json":
+        print(json.dumps({query: config.get(query) for query in args.query}))
+    elif args.export == "env":
+        for query in args.query:
+            value = config.get(query, "")
+            print(f"{export_name(query)}={shlex.quote(value)}")
+    else:
+        for query in args.query:
+            print(config.get(query, ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,107 @@
+"""Import time report for HyDE Python scripts.
+
+hyde-shell runs scripts through this module when HYDE_PROFILE_IMPORTS=1:
+
+    HYDE_PROFILE_IMPORTS=1 hyde-shell weather
+
+The script runs under ``python -X importtime`` with its stdin and stdout
+untouched, so waybar ``exec`` modules can be profiled in place. The timings
+are summarized on stderr when the script exits and the full ``-X importtime``
+output is kept in $XDG_RUNTIME_DIR/hyde/importtime/<script>.log.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+
+PREFIX = "import time:"
+TOP_COUNT = 15
+
+
+def parse_line(line):
+    """Parse an ``-X importtime`` line into (self_us, cumulative_us, depth, name)."""
+    fields = line[len(PREFIX) :].split("|")
+    if len(fields) != 3 or not fields[0].strip().isdigit():
+        return None
+    package = fields[2].rstrip("\n")
+    name = package.lstrip(" ")
+    depth = (len(package) - len(name) - 1) // 2
+    return int(fields[0]), int(fields[1]), depth, name
+
+
+def summarize(script, entries):
+    """Build the report: total, top level imports and the slowest modules."""
+    top_level = [entry for entry in entries if entry[2] == 0]
+    total = sum(entry[1] for entry in top_level)
+    lines = [f"[importtime] {script}: {total / 1000:.1f} ms in imports"]
+    lines.append("[importtime] top level (cumulative):")
+    for self_us, cumulative_us, _, name in sorted(
+        top_level, key=lambda entry: entry[1], reverse=True
+    )[:TOP_COUNT]:
+        lines.append(f"[importtime] {cumulative_us / 1000:8.1f} ms  {name}")
+    lines.append("[importtime] slowest modules (self):")
+    for self_us, _, _, name in sorted(
+        entries, key=lambda entry: entry[0], reverse=True
+    )[:TOP_COUNT]:
+        lines.append(f"[importtime] {self_us / 1000:8.1f} ms  {name}")
+    return "\n".join(lines) + "\n"
+
+
+def log_path(script):
+    """Where the raw timings of a script are kept."""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    name = os.path.splitext(os.path.basename(script))[0]
+    return os.path.join(runtime_dir, "hyde", "importtime", f"{name}.log")
+
+
+def profile(script, args):
+    """Run a script with import profiling, return its exit code."""
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", script, *args],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    def forward(signum, frame):
+        process.send_signal(signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, forward)
+
+    raw = []
+    entries = []
+    # The script's own stderr is passed through as it arrives
+    for line in process.stderr:
+        if line.startswith(PREFIX):
+            raw.append(line)
+            entry = parse_line(line)
+            if entry:
+                entries.append(entry)
+        else:
+            sys.stderr.write(line)
+            sys.stderr.flush()
+    returncode = process.wait()
+
+    report = summarize(script, entries)
+    sys.stderr.write(report)
+    path = log_path(script)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(raw)
+            f.write(report)
+    except OSError:
+        pass
+    return returncode
+
+
+def main(args):
+    if not args:
+        print("Usage: importtime.py <script.py> [args...]", file=sys.stderr)
+        return 2
+    return profile(args[0], args[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
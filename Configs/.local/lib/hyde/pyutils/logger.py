@@ -1,12 +1,9 @@
 import os
 import sys
-import importlib
 
 lib_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, lib_dir)
 
-import pip_env  # noqa: E402
-
 
 def get_logger():
     """Get a unified logger instance based on the environment variable LOG_LEVEL."""
@@ -27,6 +24,10 @@ def get_logger():
 
     log_level = log_level.upper()
 
+    # Deferred so scripts without LOG_LEVEL never pay for pip_env or loguru
+    import importlib
+    import pip_env
+
     # Dynamically import logging or loguru
     try:
         log = importlib.import_module("loguru")
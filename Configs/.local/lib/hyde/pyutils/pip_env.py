@@ -1,28 +1,39 @@
 import os
 import sys
-import subprocess
-import shutil
-import argparse
-import importlib
+
+# subprocess, shutil, argparse, importlib and the notify wrapper are imported
+# where they are used: every script loads this module on start, most only
+# need get_venv_path() and an already installed v_import()
 
 lib_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, lib_dir)
 
 
-import xdg_base_dirs  # noqa: E402
-import wrapper.libnotify as notify  # noqa: E402
-
-
 if lib_dir is None:
     raise FileNotFoundError("None of the specified lib directories exist.")
     sys.exit(1)
 
 
+def _state_home():
+    """XDG_STATE_HOME as in xdg_base_dirs, without importing pathlib."""
+    state_home = os.environ.get("XDG_STATE_HOME")
+    if state_home and os.path.isabs(state_home):
+        return state_home
+    return os.path.join(os.path.expanduser("~"), ".local", "state")
+
+
+def _notify(*args, **kwargs):
+    """Send a desktop notification, loading the wrapper on first use."""
+    import wrapper.libnotify as notify
+
+    notify.send(*args, **kwargs)
+
+
 def get_venv_path():
     """Set up the virtual environment path and modify sys.path."""
-    venv_path = os.path.join(xdg_base_dirs.xdg_state_home(), "hyde", "pip_env")
+    venv_path = os.path.join(_state_home(), "hyde", "pip_env")
     if not os.path.exists(venv_path):
-        venv_path = os.path.join(xdg_base_dirs.xdg_state_home(), "hyde", "pip_env")
+        venv_path = os.path.join(_state_home(), "hyde", "pip_env")
     site_packages_path = os.path.join(
         venv_path,
         "lib",
@@ -35,6 +46,8 @@ def get_venv_path():
 
 def create_venv(venv_path, requirements_file=None):
     """Create a virtual environment and optionally install dependencies."""
+    import subprocess
+
     if not os.path.exists(os.path.join(venv_path, "bin", "pip")):
         subprocess.run([sys.executable, "-m", "venv", venv_path], check=True)
         pip_executable = os.path.join(venv_path, "bin", "pip")
@@ -49,7 +62,7 @@ def create_venv(venv_path, requirements_file=None):
                     ]
                 )
 
-            notify.send(
+            _notify(
                 "HyDE PIP",
                 f"⏳ Installing virtual environment Dependencies:\n {list_requirements}",
             )
@@ -59,13 +72,15 @@ def create_venv(venv_path, requirements_file=None):
                 text=True,
             )
             result.check_returncode()
-        notify.send("HyDE PIP", "✅ Virtual environment created successfully")
+        _notify("HyDE PIP", "✅ Virtual environment created successfully")
     else:
         pass
 
 
 def destroy_venv(venv_path):
     """Destroy the virtual environment while retaining the requirements.txt file."""
+    import shutil
+
     if os.path.exists(venv_path):
         shutil.rmtree(venv_path)
     # else:
@@ -73,6 +88,8 @@ def destroy_venv(venv_path):
 
 def install_dependencies(venv_path, requirements_file):
     """Install dependencies in the virtual environment."""
+    import subprocess
+
     if not os.path.exists(venv_path):
         create_venv(venv_path, requirements_file)
     else:
@@ -84,6 +101,8 @@ def install_dependencies(venv_path, requirements_file):
 
 def install_package(venv_path, package):
     """Install a single package in the virtual environment."""
+    import subprocess
+
     if not os.path.exists(venv_path):
         create_venv(venv_path)
     pip_executable = os.path.join(venv_path, "bin", "pip")
@@ -97,6 +116,8 @@ def install_package(venv_path, package):
 
 def uninstall_package(venv_path, package):
     """Uninstall a single package from the virtual environment."""
+    import subprocess
+
     pip_executable = os.path.join(venv_path, "bin", "pip")
     result = subprocess.run(
         [pip_executable, "uninstall", "-y", package],
@@ -108,11 +129,13 @@ def uninstall_package(venv_path, package):
 
 def rebuild_venv(venv_path=None, requirements_file=None):
     """Rebuild the virtual environment: reinstall if missing, install/upgrade requirements, and update all packages."""
+    import subprocess
+
     # Use XDG_STATE_HOME for venv_path if not provided
     if venv_path is None:
-        venv_path = os.path.join(xdg_base_dirs.xdg_state_home(), "hyde", "pip_env")
+        venv_path = os.path.join(_state_home(), "hyde", "pip_env")
         if not os.path.exists(venv_path):
-            venv_path = os.path.join(xdg_base_dirs.xdg_state_home(), "hyde", "pip_env")
+            venv_path = os.path.join(_state_home(), "hyde", "pip_env")
     pip_executable = os.path.join(venv_path, "bin", "pip")
     # Recreate venv if missing
     if not os.path.exists(pip_executable):
@@ -139,7 +162,7 @@ def rebuild_venv(venv_path=None, requirements_file=None):
             text=True,
         )
         if result.returncode != 0:
-            notify.send(
+            _notify(
                 "HyDE PIP",
                 f"Failed to install requirements:\n{result.stderr or result.stdout}",
                 urgency="critical",
@@ -149,7 +172,7 @@ def rebuild_venv(venv_path=None, requirements_file=None):
         else:
             short = _short_summary(result.stdout, result.stderr)
             if short:
-                notify.send("HyDE PIP", short)
+                _notify("HyDE PIP", short)
 
     # Upgrade all installed packages (list outdated and upgrade)
     result = subprocess.run(
@@ -158,7 +181,7 @@ def rebuild_venv(venv_path=None, requirements_file=None):
         text=True,
     )
     if result.returncode != 0:
-        notify.send(
+        _notify(
             "HyDE PIP",
             f"Failed to list outdated packages:\n{result.stderr or result.stdout}",
             urgency="critical",
@@ -174,7 +197,7 @@ def rebuild_venv(venv_path=None, requirements_file=None):
             text=True,
         )
         if res2.returncode != 0:
-            notify.send(
+            _notify(
                 "HyDE PIP",
                 f"Failed to upgrade packages:\n{res2.stderr or res2.stdout}",
                 urgency="critical",
@@ -184,20 +207,22 @@ def rebuild_venv(venv_path=None, requirements_file=None):
         else:
             short2 = _short_summary(res2.stdout, res2.stderr)
             if short2:
-                notify.send("HyDE PIP", short2)
+                _notify("HyDE PIP", short2)
 
-    notify.send("HyDE PIP", "✅ Virtual environment rebuilt and packages updated.")
+    _notify("HyDE PIP", "✅ Virtual environment rebuilt and packages updated.")
 
 
 def v_import(module_name):
     """Dynamically import a module, installing it if necessary."""
+    import importlib
+
     venv_path = get_venv_path()
     sys.path.insert(0, venv_path)  # Ensure sys.path is updated before import
     try:
         module = importlib.import_module(module_name)
         return module
     except ImportError:
-        notify.send("HyDE PIP", f"Installing {module_name} module...")
+        _notify("HyDE PIP", f"Installing {module_name} module...")
         install_package(venv_path, module_name)
 
         # Reload sys.path to include the new module
@@ -215,10 +240,10 @@ def v_import(module_name):
 
         try:
             module = importlib.import_module(module_name)
-            notify.send("HyDE PIP", f"Successfully installed {module_name}.")
+            _notify("HyDE PIP", f"Successfully installed {module_name}.")
             return module
         except ImportError as e:
-            notify.send(
+            _notify(
                 "HyDE Error",
                 f"Failed to import module {module_name} after installation: {e}",
                 urgency="critical",
@@ -232,6 +257,8 @@ def v_install(module_name, force_reinstall=False):
         module_name (str): Name of module to install
         force_reinstall (bool): If True, reinstall even if module exists
     """
+    import subprocess
+
     venv_path = get_venv_path()
     if not os.path.exists(os.path.join(venv_path, "bin", "pip")):
         create_venv(venv_path)
@@ -243,9 +270,9 @@ def v_install(module_name, force_reinstall=False):
         text=True,
     )
     if result.returncode != 0 or force_reinstall:
-        notify.send("HyDE PIP", f"Installing {module_name} module...")
+        _notify("HyDE PIP", f"Installing {module_name} module...")
         install_package(venv_path, module_name)
-        notify.send("HyDE PIP", f"Successfully installed {module_name}.")
+        _notify("HyDE PIP", f"Successfully installed {module_name}.")
     sys.path.insert(0, venv_path)
     sys.path.insert(
         0,
@@ -259,6 +286,8 @@ def v_install(module_name, force_reinstall=False):
 
 
 def main(args):
+    import argparse
+
     parser = argparse.ArgumentParser(description="Python environment manager for HyDE")
     subparsers = parser.add_subparsers(dest="command")
 
@@ -20,6 +20,7 @@ import json
 import subprocess
 import os
 import argparse
+import socket
 import time
 import sys
 
@@ -218,6 +219,52 @@ def get_sensor_data(result_sensors, page=0):
     return {"text": text, "tooltip": tooltip}
 
 
+def read_sensors():
+    # Use sensors library if available, else fallback to subprocess
+    try:
+        import sensors
+
+        sensors.init()
+        sensors_data = {}
+        for chip in sensors.iter_detected_chips():
+            chip_name = str(chip)
+            sensors_data[chip_name] = {}
+            for feature in chip:
+                label = feature.label
+                value = feature.get_value()
+                sensors_data[chip_name][label] = value
+        return type("Result", (), {"stdout": json.dumps(sensors_data)})()
+    except ImportError:
+        # Fallback to subprocess if python-sensors is not available
+        return subprocess.run(
+            ["sensors", "-j"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=True,
+        )
+
+
+def get_sensor_info():
+    """Sensor output for the saved page, used by the bar daemon"""
+    result_sensors = read_sensors()
+    devices = list(json.loads(result_sensors.stdout).keys())
+    total_pages = max(1, (len(devices) + PAGE_SIZE - 1) // PAGE_SIZE)
+    return get_sensor_data(result_sensors, get_current_page(total_pages))
+
+
+def refresh_bar_daemon():
+    """Ask a running bar daemon to show the new page right away"""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    sock_path = os.path.join(runtime_dir, "hyde", "bar", "sensorsinfo.sock")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(sock_path)
+            sock.sendall(b"refresh\n")
+    except OSError:
+        pass
+
+
 def main():
     parser = argparse.ArgumentParser(description="Sensor Info")
     parser.add_argument(
@@ -231,29 +278,7 @@ def main():
     args = parser.parse_args()
 
     while True:
-        # Use sensors library if available, else fallback to subprocess
-        try:
-            import sensors
-
-            sensors.init()
-            sensors_data = {}
-            for chip in sensors.iter_detected_chips():
-                chip_name = str(chip)
-                sensors_data[chip_name] = {}
-                for feature in chip:
-                    label = feature.label
-                    value = feature.get_value()
-                    sensors_data[chip_name][label] = value
-            result_sensors = type("Result", (), {"stdout": json.dumps(sensors_data)})()
-        except ImportError:
-            # Fallback to subprocess if python-sensors is not available
-            result_sensors = subprocess.run(
-                ["sensors", "-j"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True,
-                check=True,
-            )
+        result_sensors = read_sensors()
         sensors_data = json.loads(result_sensors.stdout)
         devices = list(sensors_data.keys())
         total_pages = (len(devices) + PAGE_SIZE - 1) // PAGE_SIZE
@@ -266,6 +291,8 @@ def main():
             page = (page - 1 + total_pages) % total_pages
             subprocess.run(["pkill", "-RTMIN+19", "waybar"], check=False)
         save_current_page(page)
+        if args.next or args.prev:
+            refresh_bar_daemon()
         sensor_info = get_sensor_data(result_sensors, page)
         print(json.dumps(sensor_info, separators=(",", ":")))
         sys.stdout.flush()
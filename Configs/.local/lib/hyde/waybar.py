@@ -12,10 +12,12 @@ import sys
 import hashlib
 import signal
 
+from contextlib import contextmanager
 from pathlib import Path
 
 import pyutils.wrapper.libnotify as notify
 import pyutils.compositor as HYPRLAND
+import pyutils.hyprconf as hyprconf
 import pyutils.logger as logger
 
 from pyutils.wrapper.rofi import rofi_dmenu
@@ -100,62 +102,160 @@ def find_layout_files():
     return sorted(layouts)
 
 
+class StateStore:
+    """The state file and HyDE config, parsed once and kept in memory.
+
+    Both files are re-read only when their mtime, size or inode changes, so
+    edits from other processes are still seen. Writes inside transaction()
+    are batched and committed with a single atomic rename of the state file.
+    """
+
+    def __init__(self, state_file, config_file):
+        self.state_file = Path(state_file)
+        self.config_file = Path(config_file)
+        self._state = {}
+        self._state_stamp = None
+        self._config = {}
+        self._config_stamp = None
+        self._pending = None
+        self._depth = 0
+
+    @staticmethod
+    def _stamp(path):
+        """Identify a file version by mtime, size and inode, None if missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    @staticmethod
+    def _parse(path, strip_export=False):
+        """Parse KEY=value lines, the first occurrence of a key wins."""
+        values = {}
+        with open(path, "r") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                if strip_export and line.startswith("export "):
+                    line = line[7:]  # Remove "export "
+                key, sep, value = line.partition("=")
+                # Lines without "=" are kept as they are when rewriting
+                values.setdefault(key, value.strip() if sep else None)
+        return values
+
+    def _refresh_state(self):
+        stamp = self._stamp(self.state_file)
+        if stamp != self._state_stamp:
+            self._state = self._parse(self.state_file) if stamp else {}
+            self._state_stamp = stamp
+
+    def _refresh_config(self):
+        stamp = self._stamp(self.config_file)
+        if stamp != self._config_stamp:
+            self._config = self._parse(self.config_file, True) if stamp else {}
+            self._config_stamp = stamp
+
+    def get_state(self, key, default=None):
+        """Get a value from the state file, including uncommitted writes."""
+        if self._pending and key in self._pending:
+            return self._pending[key]
+        self._refresh_state()
+        value = self._state.get(key)
+        return default if value is None else value
+
+    def has_state(self, key):
+        """Check whether the state file has an entry for key."""
+        return self.get_state(key) is not None
+
+    def get_config(self, key, default=None):
+        """Get a value from the HyDE config file."""
+        self._refresh_config()
+        value = self._config.get(key)
+        return default if value is None else value
+
+    def set_state(self, key, value):
+        """Set a state value, written at the end of the current transaction."""
+        if self._pending is not None:
+            self._pending[key] = str(value)
+        else:
+            self._commit({key: str(value)})
+
+    @contextmanager
+    def transaction(self):
+        """Batch set_state() calls into one write, nested calls join the outer one."""
+        outermost = self._depth == 0
+        if outermost:
+            self._pending = {}
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            if outermost:
+                self._pending = None
+            raise
+        finally:
+            self._depth -= 1
+        if outermost:
+            pending, self._pending = self._pending, None
+            self._commit(pending)
+
+    def _commit(self, changes):
+        """Merge changes into the file as it is on disk and swap it in."""
+        self._refresh_state()
+        if self._state_stamp and all(
+            self._state.get(key) == value for key, value in changes.items()
+        ):
+            return
+        state = dict(self._state)
+        state.update(changes)
+
+        target = os.path.realpath(self.state_file)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w") as file:
+                for key, value in state.items():
+                    file.write(key if value is None else f"{key}={value}")
+                    file.write("\n")
+            os.replace(temp_path, target)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self._state = state
+        self._state_stamp = self._stamp(self.state_file)
+
+
+STATE = StateStore(STATE_FILE, HYDE_CONFIG)
+
+
 def get_state_value(key, default=None):
     """Get a value from the state file."""
-    if not STATE_FILE.exists():
-        return default
-
-    with open(STATE_FILE, "r") as file:
-        for line in file:
-            if line.startswith(f"{key}="):
-                return line.split("=", 1)[1].strip()
-    return default
+    return STATE.get_state(key, default)
 
 
 def get_config_value(key, default=None):
     """Get a value from the config file or state file."""
-    if HYDE_CONFIG.exists():
-        with open(HYDE_CONFIG, "r") as file:
-            for line in file:
-                clean_line = line.strip()
-                if clean_line.startswith("export "):
-                    clean_line = clean_line[7:]  # Remove "export "
-                if clean_line.startswith(f"{key}="):
-                    return clean_line.split("=", 1)[1].strip()
-    return default
+    return STATE.get_config(key, default)
 
 
 def set_state_value(key, value):
     """Set or update a value in the state file, removing any duplicates."""
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-    if not STATE_FILE.exists():
-        with open(STATE_FILE, "w") as file:
-            file.write(f"{key}={value}\n")
-        return True
-
-    existing_lines = []
-    seen_keys = set()
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r") as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    current_key = line.split("=", 1)[0]
-                    if current_key not in seen_keys and current_key != key:
-                        existing_lines.append(line)
-                        seen_keys.add(current_key)
-                except Exception:
-                    existing_lines.append(line)
+    STATE.set_state(key, value)
+    return True
 
-    existing_lines.append(f"{key}={value}")
 
-    with open(STATE_FILE, "w") as file:
-        file.write("\n".join(existing_lines) + "\n")
-
-    return True
+def get_theme_name():
+    """Get the current theme name from the state file."""
+    theme_name = get_state_value("HYDE_THEME")
+    if theme_name:
+        theme_name = theme_name.strip('"').strip("'")
+        logger.debug(f"Found theme name in state file: {theme_name}")
+    return theme_name or None
 
 
 def get_current_layout_from_config():
@@ -190,8 +290,9 @@ def get_current_layout_from_config():
 
         layout = layouts[0]
         layout_name = os.path.basename(layout).replace(".jsonc", "")
-        set_state_value("WAYBAR_LAYOUT_PATH", layout)
-        set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
+        with STATE.transaction():
+            set_state_value("WAYBAR_LAYOUT_PATH", layout)
+            set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
 
         shutil.copyfile(layout, CONFIG_JSONC)
         logger.debug(f"Created config.jsonc with first layout: {layout}")
@@ -205,8 +306,9 @@ def get_current_layout_from_config():
         if get_file_hash(layout_file) == config_hash:
             logger.debug(f"Found current layout by hash: {layout_file}")
             layout_name = os.path.basename(layout_file).replace(".jsonc", "")
-            set_state_value("WAYBAR_LAYOUT_PATH", layout_file)
-            set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
+            with STATE.transaction():
+                set_state_value("WAYBAR_LAYOUT_PATH", layout_file)
+                set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
             layout = layout_file
             return layout
 
@@ -218,8 +320,9 @@ def get_current_layout_from_config():
         layout = layouts[0]
 
         layout_name = os.path.basename(layout).replace(".jsonc", "")
-        set_state_value("WAYBAR_LAYOUT_PATH", layout)
-        set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
+        with STATE.transaction():
+            set_state_value("WAYBAR_LAYOUT_PATH", layout)
+            set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
 
         shutil.copyfile(layout, CONFIG_JSONC)
         logger.debug(f"Updated config.jsonc with layout: {layout}")
@@ -239,22 +342,20 @@ def ensure_state_file():
         layout_name = os.path.basename(current_layout).replace(".jsonc", "") if current_layout else ""
         style_path = resolve_style_path(current_layout) if current_layout else ""
 
-        with open(STATE_FILE, "w") as file:
-            if current_layout:
-                file.write(f"WAYBAR_LAYOUT_PATH={current_layout}\n")
-                file.write(f"WAYBAR_LAYOUT_NAME={layout_name}\n")
-                file.write(f"WAYBAR_STYLE_PATH={style_path}\n")
-                logger.debug(f"Created state file with layout: {current_layout}")
-            else:
-                logger.warning("No layout found to write to state file")
+        if current_layout:
+            with STATE.transaction():
+                set_state_value("WAYBAR_LAYOUT_PATH", current_layout)
+                set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
+                set_state_value("WAYBAR_STYLE_PATH", style_path)
+            logger.debug(f"Created state file with layout: {current_layout}")
+        else:
+            STATE_FILE.touch()
+            logger.warning("No layout found to write to state file")
         return
 
-    with open(STATE_FILE, "r") as file:
-        lines = file.readlines()
-
-    layout_path_exists = any(line.startswith("WAYBAR_LAYOUT_PATH=") for line in lines)
-    layout_name_exists = any(line.startswith("WAYBAR_LAYOUT_NAME=") for line in lines)
-    style_path_exists = any(line.startswith("WAYBAR_STYLE_PATH=") for line in lines)
+    layout_path_exists = STATE.has_state("WAYBAR_LAYOUT_PATH")
+    layout_name_exists = STATE.has_state("WAYBAR_LAYOUT_NAME")
+    style_path_exists = STATE.has_state("WAYBAR_STYLE_PATH")
 
     if not layout_path_exists or not layout_name_exists or not style_path_exists:
         logger.debug("State file is missing entries, updating it")
@@ -263,15 +364,15 @@ def ensure_state_file():
             layout_name = os.path.basename(current_layout).replace(".jsonc", "")
             style_path = resolve_style_path(current_layout)
 
-            with open(STATE_FILE, "a") as file:
+            with STATE.transaction():
                 if not layout_path_exists:
-                    file.write(f"WAYBAR_LAYOUT_PATH={current_layout}\n")
+                    set_state_value("WAYBAR_LAYOUT_PATH", current_layout)
                     logger.debug(f"Added WAYBAR_LAYOUT_PATH={current_layout}")
                 if not layout_name_exists:
-                    file.write(f"WAYBAR_LAYOUT_NAME={layout_name}\n")
+                    set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
                     logger.debug(f"Added WAYBAR_LAYOUT_NAME={layout_name}")
                 if not style_path_exists:
-                    file.write(f"WAYBAR_STYLE_PATH={style_path}\n")
+                    set_state_value("WAYBAR_STYLE_PATH", style_path)
                     logger.debug(f"Added WAYBAR_STYLE_PATH={style_path}")
 
 
@@ -327,9 +428,10 @@ def set_layout(layout):
         logger.error(f"Layout {layout} not found")
         sys.exit(1)
 
-    set_state_value("WAYBAR_LAYOUT_PATH", layout_path)
-    set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
-    set_state_value("WAYBAR_STYLE_PATH", style_path)
+    with STATE.transaction():
+        set_state_value("WAYBAR_LAYOUT_PATH", layout_path)
+        set_state_value("WAYBAR_LAYOUT_NAME", layout_name)
+        set_state_value("WAYBAR_STYLE_PATH", style_path)
 
     style_filepath = os.path.join(str(xdg_config_home()), "waybar", "style.css")
     theme_filepath = os.path.join(str(xdg_config_home()), "waybar", "theme.css")
@@ -351,25 +453,15 @@ def set_layout(layout):
         os.symlink(theme_rel_path, theme_filepath)
         logger.debug(f"Applied matching theme CSS: {theme_css_path}")
     
-    update_icon_size()
-    update_border_radius()
-    generate_includes()
-    update_global_css()
     notify.send("Waybar", f"Layout changed to {layout}", replace_id=9)
-    restart_waybar()
+    apply_waybar_changes(style_path, layout_path)
 
 
 def handle_layout_navigation(option):
     """Handle --next, --prev, and --set options."""
     layouts_data = list_layouts()
     layout_list = [layout["layout"] for layout in layouts_data["layouts"] if not layout.get("is_backup_entry")]
-    current_layout = None
-
-    with open(STATE_FILE, "r") as file:
-        for line in file:
-            if line.startswith("WAYBAR_LAYOUT_PATH="):
-                current_layout = line.split("=")[1].strip()
-                break
+    current_layout = get_state_value("WAYBAR_LAYOUT_PATH")
 
     if not current_layout:
         logger.error("Current layout not found in state file.")
@@ -548,6 +640,26 @@ def restart_waybar():
     logger.debug(f"Restarted Waybar systemd unit: {UNIT_NAME}")
 
 
+def reload_waybar():
+    """Reload config and style of the running Waybar in place via SIGUSR2."""
+    # Only the main process, the exec modules in the unit would die of SIGUSR2
+    cmd = [
+        "systemctl",
+        "--user",
+        "kill",
+        "--kill-whom=main",
+        "-s",
+        "SIGUSR2",
+        UNIT_NAME,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"Failed to reload Waybar: {result.stderr.strip()}")
+        return False
+    logger.debug(f"Reloaded Waybar systemd unit: {UNIT_NAME}")
+    return True
+
+
 def kill_waybar_and_watcher():
     """Kill all Waybar instances and watcher scripts for the current user."""
     kill_waybar()
@@ -684,16 +796,12 @@ def style_selector(current_layout=None):
         style_filepath = os.path.join(str(xdg_config_home()), "waybar", "style.css")
         write_style_file(style_filepath, selected_style)
         set_state_value("WAYBAR_STYLE_PATH", selected_style)
-        update_icon_size()
-        update_border_radius()
-        generate_includes()
-        update_global_css()
         notify.send(
             "Waybar",
             f"Style changed to {os.path.basename(selected_style)}",
             replace_id=9,
         )
-        restart_waybar()
+        apply_waybar_changes(selected_style)
     sys.exit(0)
 
 
@@ -734,24 +842,21 @@ def layout_selector():
         else:
             style_path = resolve_style_path(selected_layout)
         shutil.copyfile(selected_layout, CONFIG_JSONC)
-        set_state_value("WAYBAR_LAYOUT_PATH", selected_layout)
-        set_state_value(
-            "WAYBAR_LAYOUT_NAME",
-            os.path.basename(selected_layout).replace(".jsonc", ""),
-        )
-        set_state_value("WAYBAR_STYLE_PATH", style_path)
+        with STATE.transaction():
+            set_state_value("WAYBAR_LAYOUT_PATH", selected_layout)
+            set_state_value(
+                "WAYBAR_LAYOUT_NAME",
+                os.path.basename(selected_layout).replace(".jsonc", ""),
+            )
+            set_state_value("WAYBAR_STYLE_PATH", style_path)
         style_filepath = os.path.join(str(xdg_config_home()), "waybar", "style.css")
         write_style_file(style_filepath, style_path)
-        update_icon_size()
-        update_border_radius()
-        generate_includes()
-        update_global_css()
         notify.send(
             "Waybar",
             f"Layout changed to {display_func(selected_layout, os.path.dirname(selected_layout))}",
             replace_id=9,
         )
-        restart_waybar()
+        apply_waybar_changes(style_path, selected_layout)
     ensure_state_file()
     return None
 
@@ -982,20 +1087,17 @@ def get_waybar_icon_size():
     return get_waybar_value_from_sources("icon size", 10, icon_sources)
 
 
-def get_value_from_hypr_theme(variable_name):
-    """Get named setting from hypr.theme file using hyq."""
-    theme_name = None
-    if STATE_FILE.exists():
-        try:
-            with open(STATE_FILE, "r") as file:
-                for line in file:
-                    if line.startswith("HYDE_THEME="):
-                        theme_name = line.strip().split("=", 1)[1].strip('"').strip("'")
-                        logger.debug(f"Found theme name in state file: {theme_name}")
-                        break
-        except Exception as e:
-            logger.error(f"Error reading state file: {e}")
-            return None
+# Everything waybar.py reads from hypr.theme
+THEME_QUERIES = ["$BAR_FONT", "$BAR_FONT_SIZE", "$BAR_ICON_SIZE", "decoration:rounding"]
+
+
+def get_hypr_theme_path():
+    """Get the current theme's hypr.theme path from the state file."""
+    try:
+        theme_name = get_theme_name()
+    except Exception as e:
+        logger.error(f"Error reading state file: {e}")
+        return None
 
     if not theme_name:
         logger.debug("No theme name found in state file")
@@ -1014,127 +1116,67 @@ def get_value_from_hypr_theme(variable_name):
         return None
 
     logger.debug(f"Found hypr.theme at {hypr_theme_path}")
+    return hypr_theme_path
 
-    try:
-        import shlex
-
-        cmd = [
-            "hyq",
-            shlex.quote(hypr_theme_path),
-            "--query",
-            variable_name,
-        ]
-        logger.debug(f"Running command: {' '.join(cmd)}")
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
 
-        logger.debug(f"hyq command output: {result.stdout.strip()}")
-        logger.debug(f"hyq command stderr: {result.stderr.strip() if result.stderr else 'None'}")
-        logger.debug(f"hyq exit code: {result.returncode}")
+def get_theme_values():
+    """Resolve THEME_QUERIES from hypr.theme with the native config parser."""
+    hypr_theme_path = get_hypr_theme_path()
+    if not hypr_theme_path:
+        return {}
 
-        if result.returncode == 0 and result.stdout:
-            output_lines = result.stdout.strip().split("\n")
-            for line in reversed(output_lines):
-                clean_line = line.strip()
-                if clean_line and not clean_line.startswith("#"):
-                    logger.debug(f"Successfully parsed {variable_name} from hyq: {clean_line}")
-                    return clean_line
-
-        logger.debug(f"No valid output from hyq for {variable_name}")
-        return None
+    try:
+        config = hyprconf.load(hypr_theme_path)
     except Exception as e:
-        logger.error(f"Error running hyq command: {e}")
-        return None
+        logger.error(f"Error parsing {hypr_theme_path}: {e}")
+        return {}
 
+    values = {}
+    for query in THEME_QUERIES:
+        value = (config.get(query) or "").strip()
+        if value:
+            logger.debug(f"Successfully parsed {query} from hypr.theme: {value}")
+            values[query] = value
+    return values
 
-def update_border_radius():
-    css_filepath = os.path.join(str(xdg_config_home()), "waybar", "includes", "border-radius.css")
-    logger.debug(f"Updating border radius in {css_filepath}")
 
-    ensure_directory_exists(css_filepath)
-    logger.debug("Directory for border-radius.css ensured")
+def get_value_from_hypr_theme(variable_name):
+    """Get named setting from hypr.theme file."""
+    value = get_theme_values().get(variable_name)
+    if value is None:
+        logger.debug(f"No value in hypr.theme for {variable_name}")
+    return value
+
+
+def find_border_radius_template():
+    """Get the first border-radius.css template found in INCLUDES_DIRS."""
+    for includes_dir in INCLUDES_DIRS:
+        template_path = os.path.join(includes_dir, "border-radius.css")
+        if os.path.exists(template_path):
+            return template_path
+    return None
 
-    if not os.path.exists(css_filepath):
-        for includes_dir in INCLUDES_DIRS:
-            template_path = os.path.join(includes_dir, "border-radius.css")
-            if os.path.exists(template_path):
-                logger.debug(f"Found template at {template_path}, copying to {css_filepath}")
-                shutil.copyfile(template_path, css_filepath)
-                break
-        else:
-            logger.error("Template for border-radius.css not found in INCLUDES_DIRS")
-            return
 
+def get_border_radius():
+    """Get the bar border radius from the environment, hypr.theme or hyprctl."""
     border_radius = os.getenv("WAYBAR_BORDER_RADIUS")
     logger.debug(f"WAYBAR_BORDER_RADIUS environment variable: {border_radius}")
+    if border_radius:
+        try:
+            border_radius = int(border_radius)
+        except ValueError:
+            logger.debug(f"Invalid WAYBAR_BORDER_RADIUS: '{border_radius}'")
+            border_radius = None
 
     if not border_radius:
-        logger.debug(f"Looking for theme name in state file: {STATE_FILE}")
-
-        theme_name = None
-        if os.path.exists(STATE_FILE):
+        rounding = get_value_from_hypr_theme("decoration:rounding")
+        if rounding:
             try:
-                with open(STATE_FILE, "r") as file:
-                    for line in file:
-                        if line.startswith("HYDE_THEME="):
-                            theme_name = line.strip().split("=", 1)[1].strip('"').strip("'")
-                            logger.debug(f"Found theme name in state file: {theme_name}")
-                            break
-            except Exception as e:
-                logger.error(f"Error reading state file: {e}")
-
-        if theme_name:
-            theme_dir = os.path.join(str(xdg_config_home()), "hyde", "themes", theme_name)
-            logger.debug(f"Looking for theme directory at: {theme_dir}")
-
-            if os.path.exists(theme_dir):
-                hypr_theme_path = os.path.join(theme_dir, "hypr.theme")
-                if os.path.exists(hypr_theme_path):
-                    logger.debug(f"Found hypr.theme at {hypr_theme_path}")
-
-                    try:
-                        import shlex
-
-                        cmd = [
-                            "hyq",
-                            shlex.quote(hypr_theme_path),
-                            "--query",
-                            "decoration:rounding",
-                        ]
-                        logger.debug(f"Running command: {' '.join(cmd)}")
-
-                        border_radius_result = subprocess.run(cmd, capture_output=True, text=True)
-
-                        logger.debug(f"hyq command output: {border_radius_result.stdout.strip()}")
-                        logger.debug(f"hyq command stderr: {border_radius_result.stderr.strip() if border_radius_result.stderr else 'None'}")
-                        logger.debug(f"hyq exit code: {border_radius_result.returncode}")
-
-                        if border_radius_result.stdout:
-                            output_lines = border_radius_result.stdout.strip().split("\n")
-                            for line in reversed(output_lines):
-                                clean_line = line.strip()
-                                if clean_line.isdigit():
-                                    border_radius = int(clean_line)
-                                    logger.debug(f"Successfully parsed border radius from hyq: {border_radius}")
-                                    break
-                            else:
-                                last_line = output_lines[-1].strip()
-                                try:
-                                    border_radius = int(last_line)
-                                    logger.debug(f"Successfully parsed border radius from hyq last line: {border_radius}")
-                                except ValueError:
-                                    logger.debug(f"Failed to parse border radius from hyq output: '{last_line}'")
-                                    border_radius = None
-                        else:
-                            logger.debug("Empty output from hyq command")
-                            border_radius = None
-                    except Exception as e:
-                        logger.error(f"Error running hyq command: {e}")
-                        border_radius = None
-                else:
-                    logger.debug(f"hypr.theme not found at {hypr_theme_path}")
-            else:
-                logger.debug(f"Theme directory not found at {theme_dir}")
+                border_radius = int(rounding)
+                logger.debug(f"Successfully parsed border radius from hypr.theme: {border_radius}")
+            except ValueError:
+                logger.debug(f"Failed to parse border radius from hypr.theme: '{rounding}'")
+                border_radius = None
 
     if not border_radius:
         logger.debug("Trying to get border radius from hyprctl")
@@ -1164,6 +1206,26 @@ def update_border_radius():
         logger.debug(f"Border radius is invalid, using default: {border_radius}")
 
     logger.debug(f"Final border radius value: {border_radius}")
+    return border_radius
+
+
+def update_border_radius(border_radius=None):
+    css_filepath = os.path.join(str(xdg_config_home()), "waybar", "includes", "border-radius.css")
+    logger.debug(f"Updating border radius in {css_filepath}")
+
+    ensure_directory_exists(css_filepath)
+    logger.debug("Directory for border-radius.css ensured")
+
+    if not os.path.exists(css_filepath):
+        template_path = find_border_radius_template()
+        if not template_path:
+            logger.error("Template for border-radius.css not found in INCLUDES_DIRS")
+            return
+        logger.debug(f"Found template at {template_path}, copying to {css_filepath}")
+        shutil.copyfile(template_path, css_filepath)
+
+    if border_radius is None:
+        border_radius = get_border_radius()
 
     with open(css_filepath, "r") as file:
         content = file.read()
@@ -1211,9 +1273,21 @@ def generate_includes():
 
 
 def update_config(config_path):
-    CONFIG_JSONC = os.path.join(str(xdg_config_home()), "waybar", "config.jsonc")
+    """Copy the given file to config.jsonc and record it as the current layout.
+
+    Recording it makes it the config target's input, so later builds keep it.
+    """
+    config_path = os.path.abspath(config_path)
+    if not os.path.exists(config_path):
+        logger.error(f"Config file not found: {config_path}")
+        sys.exit(1)
+    with STATE.transaction():
+        set_state_value("WAYBAR_LAYOUT_PATH", config_path)
+        set_state_value("WAYBAR_LAYOUT_NAME", os.path.basename(config_path).replace(".jsonc", ""))
+    CONFIG_JSONC.parent.mkdir(parents=True, exist_ok=True)
     shutil.copyfile(config_path, CONFIG_JSONC)
     logger.debug(f"Successfully copied config from '{config_path}' to '{CONFIG_JSONC}'")
+    return config_path
 
 
 def update_style(style_path):
@@ -1244,6 +1318,218 @@ def update_style(style_path):
     write_style_file(style_filepath, style_path)
 
 
+def get_file_digest(filepath):
+    """SHA256 of a file, None if it does not exist."""
+    try:
+        return get_file_hash(filepath)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def get_module_files():
+    """All module files waybar includes, in MODULE_DIRS order."""
+    module_files = []
+    for directory in MODULE_DIRS:
+        module_files.extend(sorted(glob.glob(os.path.join(directory, "*.json"))))
+        module_files.extend(sorted(glob.glob(os.path.join(directory, "*.jsonc"))))
+    return module_files
+
+
+class BuildTarget:
+    """A generated waybar file and the inputs it is built from.
+
+    inputs() returns a JSON serializable dict of everything the output
+    depends on; build(inputs) writes the output from it.
+    """
+
+    def __init__(self, name, output, inputs, build):
+        self.name = name
+        self.output = output
+        self.inputs = inputs
+        self.build = build
+
+
+class WaybarBuild:
+    """Rebuild generated waybar files only when they are stale.
+
+    The manifest records, per target, a hash of the inputs it was last
+    built from and of the output that build produced. A target is rebuilt
+    when either no longer matches, and counts as changed when its inputs
+    or output differ from the ones recorded, i.e. from what waybar last
+    loaded. Inputs count too, since outputs like style.css only import
+    files whose content waybar reads on reload.
+    """
+
+    MANIFEST_FILE = os.path.join(str(xdg_cache_home()), "hyde", "waybar", "manifest.json")
+    VERSION = 1
+
+    def __init__(self):
+        # Changed outputs waybar has not been restarted for yet
+        self.pending = []
+        self._manifest = None
+
+    def _load_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self.MANIFEST_FILE, "r") as file:
+                    manifest = json.load(file)
+                if manifest.get("version") != self.VERSION:
+                    raise ValueError("manifest version changed")
+                self._manifest = manifest["targets"]
+            except (OSError, ValueError, KeyError, AttributeError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self):
+        ensure_directory_exists(self.MANIFEST_FILE)
+        temp_path = f"{self.MANIFEST_FILE}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"version": self.VERSION, "targets": self._manifest}, file, indent=2)
+        os.replace(temp_path, self.MANIFEST_FILE)
+
+    def run(self, targets):
+        """Build the stale targets in order, returns the names that changed."""
+        manifest = self._load_manifest()
+        changed = []
+        for target in targets:
+            inputs = target.inputs()
+            input_hash = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+            entry = manifest.get(target.name, {})
+            output_hash = get_file_digest(target.output)
+
+            if output_hash and entry.get("inputs") == input_hash and entry.get("output") == output_hash:
+                logger.debug(f"{target.name} is up to date")
+                continue
+
+            logger.debug(f"Rebuilding {target.name}")
+            target.build(inputs)
+            output_hash = get_file_digest(target.output)
+            if output_hash != entry.get("output") or input_hash != entry.get("inputs"):
+                changed.append(target.name)
+            manifest[target.name] = {"inputs": input_hash, "output": output_hash}
+
+        try:
+            self._save_manifest()
+        except OSError as e:
+            logger.error(f"Failed to save waybar build manifest: {e}")
+        self.pending.extend(name for name in changed if name not in self.pending)
+        return changed
+
+
+BUILD = WaybarBuild()
+
+
+def get_current_style_path(style_path=None, layout_path=None):
+    """Get the style to apply: the given one, the saved one or the layout's."""
+    if style_path:
+        return style_path
+    saved_style = get_state_value("WAYBAR_STYLE_PATH")
+    if saved_style and os.path.exists(saved_style):
+        return saved_style
+    return resolve_style_path(layout_path) if layout_path else None
+
+
+def waybar_targets(style_path=None, layout_path=None):
+    """The generated waybar files, in build order.
+
+    The layout is resolved by the caller, input functions only read state.
+    """
+    waybar_dir = os.path.join(str(xdg_config_home()), "waybar")
+    wallbash_gtk_css_file = os.path.join(str(xdg_cache_home()), "hyde", "wallbash", "gtk.css")
+
+    def config_inputs():
+        return {"layout": layout_path, "layout_hash": get_file_digest(layout_path) if layout_path else None}
+
+    def build_config(inputs):
+        if inputs["layout"]:
+            CONFIG_JSONC.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(inputs["layout"], CONFIG_JSONC)
+
+    def includes_inputs():
+        return {
+            "modules": {path: get_file_digest(path) for path in get_module_files()},
+            "icon_size": get_waybar_icon_size(),
+            "position": get_config_value("WAYBAR_POSITION"),
+        }
+
+    def build_includes(inputs):
+        update_icon_size()
+        generate_includes()
+
+    def border_radius_inputs():
+        template = find_border_radius_template()
+        return {
+            "template": get_file_digest(template) if template else None,
+            "border_radius": get_border_radius(),
+        }
+
+    def global_css_inputs():
+        return {"font_family": get_waybar_font_family(), "font_size": get_waybar_font_size()}
+
+    def style_inputs():
+        style = get_current_style_path(style_path, layout_path)
+        return {
+            "style": style,
+            # style.css only imports it, waybar still has to reload its content
+            "style_hash": get_file_digest(style) if style else None,
+            "wallbash": os.path.exists(wallbash_gtk_css_file),
+        }
+
+    return [
+        BuildTarget("config.jsonc", str(CONFIG_JSONC), config_inputs, build_config),
+        BuildTarget(
+            "includes.json",
+            os.path.join(waybar_dir, "includes", "includes.json"),
+            includes_inputs,
+            build_includes,
+        ),
+        BuildTarget(
+            "border-radius.css",
+            os.path.join(waybar_dir, "includes", "border-radius.css"),
+            border_radius_inputs,
+            lambda inputs: update_border_radius(inputs["border_radius"]),
+        ),
+        BuildTarget(
+            "global.css",
+            os.path.join(waybar_dir, "includes", "global.css"),
+            global_css_inputs,
+            lambda inputs: update_global_css(),
+        ),
+        BuildTarget(
+            "style.css",
+            os.path.join(waybar_dir, "style.css"),
+            style_inputs,
+            lambda inputs: update_style(inputs["style"]),
+        ),
+    ]
+
+
+def apply_waybar_changes(style_path=None, layout_path=None, force_restart=False):
+    """Rebuild stale generated files and have waybar pick up what changed.
+
+    Every generated file is config or CSS, which a running waybar reloads
+    on SIGUSR2 without tearing down its bars and exec modules. The unit is
+    only (re)started when it is not running, the reload fails or
+    force_restart asks for it, e.g. to recover a stuck bar or module.
+    """
+    if layout_path is None:
+        layout_path = get_current_layout_from_config()
+    BUILD.run(waybar_targets(style_path, layout_path))
+    changed, BUILD.pending = BUILD.pending, []
+    if force_restart:
+        logger.debug("Restart requested, restarting waybar")
+        restart_waybar()
+    elif not is_waybar_running_for_current_user():
+        run_waybar()
+    elif changed:
+        logger.debug(f"Changed outputs: {', '.join(changed)}, reloading waybar")
+        if not reload_waybar():
+            restart_waybar()
+    else:
+        logger.debug("Generated files unchanged, nothing to reload")
+    return changed
+
+
 def watch_waybar():
     def handle_usr1(sig, frame):
         # Implement your hide/toggle logic here
@@ -1297,11 +1583,11 @@ def main():
                     layout_name = os.path.basename(layout_path).replace(".jsonc", "")
                     backup_layout(layout_name)
 
-                try:
-                    shutil.copyfile(layout_path, CONFIG_JSONC)
-                    logger.debug("Updated config.jsonc with layout from state file")
-                except Exception as e:
-                    logger.error(f"Failed to update config.jsonc: {e}")
+                    try:
+                        shutil.copyfile(layout_path, CONFIG_JSONC)
+                        logger.debug("Updated config.jsonc with layout from state file")
+                    except Exception as e:
+                        logger.error(f"Failed to update config.jsonc: {e}")
 
         elif layout_path and not os.path.exists(layout_path):
             logger.warning(f"Layout path in state file doesn't exist: {layout_path}")
@@ -1336,8 +1622,9 @@ def main():
                     if layouts:
                         first_layout = layouts[0]
                         first_layout_name = os.path.basename(first_layout).replace(".jsonc", "")
-                        set_state_value("WAYBAR_LAYOUT_PATH", first_layout)
-                        set_state_value("WAYBAR_LAYOUT_NAME", first_layout_name)
+                        with STATE.transaction():
+                            set_state_value("WAYBAR_LAYOUT_PATH", first_layout)
+                            set_state_value("WAYBAR_LAYOUT_NAME", first_layout_name)
                         CONFIG_JSONC.parent.mkdir(parents=True, exist_ok=True)
                         shutil.copyfile(first_layout, CONFIG_JSONC)
                         logger.debug(f"Used first available layout: {first_layout}")
@@ -1361,6 +1648,7 @@ def main():
     parser.add_argument("-c", "--config", type=str, help="Path to the source config.jsonc file")
     parser.add_argument("-s", "--style", type=str, help="Path to the source style.css file")
     parser.add_argument("-w", "--watch", action="store_true", help="Watch and restart Waybar if it dies")
+    parser.add_argument("-r", "--restart", action="store_true", help="Restart Waybar even if no generated file changed")
     parser.add_argument("--json", "-j", action="store_true", help="List all layouts in JSON format")
     parser.add_argument("--select-layout", "-L", action="store_true", help="Select a layout using rofi")
     parser.add_argument("--select-style", "-Y", action="store_true", help="Select a style using rofi")
@@ -1393,11 +1681,10 @@ def main():
         sys.exit(0)
 
     if args.update:
-        update_icon_size()
-        update_border_radius()
-        generate_includes()
-        update_global_css()
         logger.debug("Updating config and style...")
+        if args.watch:
+            # Otherwise the build below, before restarting waybar, covers it
+            BUILD.run(waybar_targets(args.style, get_current_layout_from_config()))
     if args.update_global_css:
         update_global_css()
     if args.update_icon_size:
@@ -1406,8 +1693,9 @@ def main():
         update_border_radius()
     if args.generate_includes:
         generate_includes()
+    layout_path = None
     if args.config:
-        update_config(args.config)
+        layout_path = update_config(args.config)
     if args.style:
         update_style(args.style)
     if args.next or args.prev or args.set:
@@ -1428,17 +1716,7 @@ def main():
     if args.watch:
         watch_waybar()
     else:
-        update_icon_size()
-        update_border_radius()
-        generate_includes()
-        update_global_css()
-        update_style(args.style)
-        restart_waybar()
-        return
-
-    if not any(vars(args).values()):
-        parser.print_help()
-        sys.exit(0)
+        apply_waybar_changes(args.style, layout_path, force_restart=args.restart)
 
 
 if __name__ == "__main__":
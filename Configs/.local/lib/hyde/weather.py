@@ -233,57 +233,63 @@ if FORECAST_DAYS not in range(4):
     FORECAST_DAYS = 3
 
 ### Main Logic ###
-data = {}
-URL = f"https://wttr.in/{get_location}?format=j1"
-
-# Get the weather data
-headers = {"User-Agent": "Mozilla/5.0"}
-response = requests.get(URL, timeout=10, headers=headers)
-try:
+def get_weather():
+    """Fetch the weather from wttr.in and build the waybar output"""
+    data = {}
+    URL = f"https://wttr.in/{get_location}?format=j1"
+
+    # Get the weather data
+    headers = {"User-Agent": "Mozilla/5.0"}
+    response = requests.get(URL, timeout=10, headers=headers)
+    # Raises json.decoder.JSONDecodeError when wttr.in sends no JSON
     weather = response.json()
-except json.decoder.JSONDecodeError:
-    sys.exit(1)
-current_weather = weather["current_condition"][0]
-
-# Get the data to display
-# waybar text
-data["text"] = get_temperature(current_weather)
-if show_icon:
-    data["text"] = get_weather_icon(current_weather) + data["text"]
-if show_location:
-    data["text"] += f" | {get_city_name(weather)}, {get_country_name(weather)}"
-
-# waybar tooltip
-data["tooltip"] = ""
-if show_today_details:
-    data["tooltip"] += (
-        f"<b>{get_description(current_weather)} {get_temperature(current_weather)}</b>\n"
-    )
-    data["tooltip"] += f"Feels like: {get_feels_like(current_weather)}\n"
-    data["tooltip"] += (
-        f"Location: {get_city_name(weather)}, {get_country_name(weather)}\n"
-    )
-    data["tooltip"] += f"Wind: {get_wind_speed(current_weather)}\n"
-    data["tooltip"] += f"Humidity: {current_weather['humidity']}%\n"
-# Get the weather forecast for the next 2 days
-for i in range(FORECAST_DAYS):
-    day_instance = weather["weather"][i]
-    data["tooltip"] += "\n<b>"
-    if i == 0:
-        data["tooltip"] += "Today, "
-    if i == 1:
-        data["tooltip"] += "Tomorrow, "
-    data["tooltip"] += f"{day_instance['date']}</b>\n"
-    data["tooltip"] += f"⬆️ {get_max_temp(day_instance)} ⬇️ {get_min_temp(day_instance)} "
-    data["tooltip"] += f"🌅 {get_sunrise(day_instance)} 🌇 {get_sunset(day_instance)}\n"
-    # Get the hourly forecast for the day
-    for hour in day_instance["hourly"]:
-        if i == 0:
-            if int(format_time(hour["time"])) < datetime.now().hour - 2:
-                continue
+    current_weather = weather["current_condition"][0]
+
+    # Get the data to display
+    # waybar text
+    data["text"] = get_temperature(current_weather)
+    if show_icon:
+        data["text"] = get_weather_icon(current_weather) + data["text"]
+    if show_location:
+        data["text"] += f" | {get_city_name(weather)}, {get_country_name(weather)}"
+
+    # waybar tooltip
+    data["tooltip"] = ""
+    if show_today_details:
         data["tooltip"] += (
-            f"{format_time(hour['time'])} {get_weather_icon(hour)} {format_temp(get_temperature_hour(hour))} {get_description(hour)}, {format_chances(hour)}\n"
+            f"<b>{get_description(current_weather)} {get_temperature(current_weather)}</b>\n"
         )
-
-
-print(json.dumps(data))
+        data["tooltip"] += f"Feels like: {get_feels_like(current_weather)}\n"
+        data["tooltip"] += (
+            f"Location: {get_city_name(weather)}, {get_country_name(weather)}\n"
+        )
+        data["tooltip"] += f"Wind: {get_wind_speed(current_weather)}\n"
+        data["tooltip"] += f"Humidity: {current_weather['humidity']}%\n"
+    # Get the weather forecast for the next 2 days
+    for i in range(FORECAST_DAYS):
+        day_instance = weather["weather"][i]
+        data["tooltip"] += "\n<b>"
+        if i == 0:
+            data["tooltip"] += "Today, "
+        if i == 1:
+            data["tooltip"] += "Tomorrow, "
+        data["tooltip"] += f"{day_instance['date']}</b>\n"
+        data["tooltip"] += f"⬆️ {get_max_temp(day_instance)} ⬇️ {get_min_temp(day_instance)} "
+        data["tooltip"] += f"🌅 {get_sunrise(day_instance)} 🌇 {get_sunset(day_instance)}\n"
+        # Get the hourly forecast for the day
+        for hour in day_instance["hourly"]:
+            if i == 0:
+                if int(format_time(hour["time"])) < datetime.now().hour - 2:
+                    continue
+            data["tooltip"] += (
+                f"{format_time(hour['time'])} {get_weather_icon(hour)} {format_temp(get_temperature_hour(hour))} {get_description(hour)}, {format_chances(hour)}\n"
+            )
+    return data
+
+
+if __name__ == "__main__":
+    try:
+        data = get_weather()
+    except json.decoder.JSONDecodeError:
+        sys.exit(1)
+    print(json.dumps(data))
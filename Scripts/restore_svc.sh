@@ -39,6 +39,10 @@ while IFS='|' read -r service context command || [ -n "$service" ]; do
     service=$(echo "$service" | xargs)
     context=$(echo "$context" | xargs)
     command=$(echo "$command" | xargs)
+
+    # Units other than services are listed with their suffix, e.g. foo.socket
+    unit="${service}"
+    [[ "$unit" == *.* ]] || unit="${unit}.service"
     
     # Check if this is the new pipe-delimited format or legacy format
     if [[ -z "$context" ]]; then
@@ -54,18 +58,18 @@ while IFS='|' read -r service context command || [ -n "$service" ]; do
         if [ "$flg_DryRun" -ne 1 ]; then
             if [ "$context" = "user" ] ; then
             if [[ -n "${DBUS_SESSION_BUS_ADDRESS}" ]] && [[ -n $XDG_RUNTIME_DIR ]];then
-                systemctl --user "${cmd_array[@]}" "${service}.service"
+                systemctl --user "${cmd_array[@]}" "${unit}"
             else 
              print_log -sec "services" -stat "error" "DBUS_SESSION_BUS_ADDRESS or XDG_RUNTIME_DIR not set for user service" -y " skipping"
             fi
             else
-                sudo systemctl "${cmd_array[@]}" "${service}.service"
+                sudo systemctl "${cmd_array[@]}" "${unit}"
             fi
         else
             if [ "$context" = "user" ]; then
-                print_log -c "[dry-run] " "systemctl --user ${cmd_array[*]} ${service}.service"
+                print_log -c "[dry-run] " "systemctl --user ${cmd_array[*]} ${unit}"
             else
-                print_log -c "[dry-run] " "sudo systemctl ${cmd_array[*]} ${service}.service"
+                print_log -c "[dry-run] " "sudo systemctl ${cmd_array[*]} ${unit}"
             fi
         fi
     fi